@@ -0,0 +1,136 @@
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+
+class DummySound:
+    def play(self, *args, **kwargs):
+        pass
+
+    def stop(self):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+
+class AssetManager:
+    def __init__(self, cache_dir=None, workers=4):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.executor = None
+        self.specs = {}
+        self.pending = {}
+        self.loaded = {}
+        self.failed = set()
+
+    def add_image(self, name, path, size):
+        self.specs[name] = ('image', path, size)
+
+    def add_sound(self, name, path, volume=1.0):
+        self.specs[name] = ('sound', path, volume)
+
+    def prefetch(self, names=None):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='assets')
+        for name in names or self.specs:
+            if name not in self.loaded and name not in self.pending:
+                self.pending[name] = self.executor.submit(self.decode, name)
+
+    def ready(self, name):
+        if name in self.loaded:
+            return True
+        future = self.pending.get(name)
+        return future is not None and future.done()
+
+    def image(self, name):
+        return self.get(name)
+
+    def sound(self, name):
+        return self.get(name)
+
+    def get(self, name):
+        if name in self.loaded:
+            return self.loaded[name]
+
+        future = self.pending.pop(name, None)
+        raw = future.result() if future is not None else self.decode(name)
+        self.loaded[name] = asset = self.finish(name, raw)
+        return asset
+
+    def decode(self, name):
+        kind, path, param = self.specs[name]
+        try:
+            if kind == 'image':
+                return self.decode_image(path, param)
+            if not pygame.mixer.get_init():
+                return None
+            return self.decode_sound(path)
+        except (pygame.error, OSError) as error:
+            self.failed.add(name)
+            print(f'Ошибка загрузки {path}: {error}')
+            return None
+
+    def finish(self, name, raw):
+        kind, path, param = self.specs[name]
+        if kind == 'sound':
+            if raw is None:
+                return DummySound()
+            raw.set_volume(param)
+            return raw
+
+        if raw is None or pygame.display.get_surface() is None:
+            return raw
+        if raw.get_flags() & pygame.SRCALPHA:
+            return raw.convert_alpha()
+        return raw.convert()
+
+    def cache_path(self, path, tag):
+        if self.cache_dir is None:
+            return None
+        base = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.cache_dir, f'{base}-{tag}-{os.stat(path).st_mtime_ns}.bin')
+
+    def read_cache(self, cached):
+        if cached is None or not os.path.exists(cached):
+            return None
+        with open(cached, 'rb') as file:
+            return file.read()
+
+    def write_cache(self, cached, data):
+        if cached is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        prefix = cached.rsplit('-', 1)[0]
+        for stale in glob.glob(glob.escape(prefix) + '-*.bin'):
+            os.remove(stale)
+        temporary = f'{cached}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, cached)
+
+    def decode_image(self, path, size):
+        cached = self.cache_path(path, f'{size[0]}x{size[1]}')
+        data = self.read_cache(cached)
+        if data is not None:
+            alpha = data[0] == 1
+            return pygame.image.frombytes(data[1:], size, 'RGBA' if alpha else 'RGB')
+
+        image = pygame.transform.scale(pygame.image.load(path), size)
+        alpha = bool(image.get_flags() & pygame.SRCALPHA)
+        mode = 'RGBA' if alpha else 'RGB'
+        self.write_cache(cached, bytes([alpha]) + pygame.image.tobytes(image, mode))
+        return image
+
+    def decode_sound(self, path):
+        frequency, size, channels = pygame.mixer.get_init()
+        cached = self.cache_path(path, f'{frequency}_{size}_{channels}')
+        data = self.read_cache(cached)
+        if data is not None:
+            return pygame.mixer.Sound(buffer=data)
+
+        sound = pygame.mixer.Sound(path)
+        self.write_cache(cached, sound.get_raw())
+        return sound
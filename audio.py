@@ -0,0 +1,103 @@
+import time
+
+import pygame
+
+
+class AudioManager:
+    def __init__(self, assets, channels=8, dedupe_window=0.1):
+        self.assets = assets
+        self.channels = channels
+        self.dedupe_window = dedupe_window
+        self.voices = {}
+        self.last_played = {}
+        self.music = None
+        self.triggered = 0
+        self.deduplicated = 0
+        self.stolen = 0
+        self.dropped = 0
+
+    def init(self):
+        if pygame.mixer.get_init():
+            pygame.mixer.set_num_channels(self.channels)
+
+    def play_music(self, path, volume=1.0, loops=-1):
+        if not pygame.mixer.get_init():
+            return False
+        try:
+            pygame.mixer.music.load(path)
+        except pygame.error as error:
+            print(f'Ошибка загрузки {path}: {error}')
+            return False
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(loops)
+        self.music = path
+        return True
+
+    def stop_music(self):
+        if pygame.mixer.get_init():
+            pygame.mixer.music.stop()
+        self.music = None
+
+    def play(self, name, priority=0):
+        if not pygame.mixer.get_init():
+            return None
+
+        now = time.monotonic()
+        if now - self.last_played.get(name, float('-inf')) < self.dedupe_window:
+            self.deduplicated += 1
+            return None
+        self.last_played[name] = now
+
+        sound = self.assets.sound(name)
+        if not isinstance(sound, pygame.mixer.Sound):
+            return None
+
+        index = self.find_channel(priority)
+        if index is None:
+            self.dropped += 1
+            return None
+
+        channel = pygame.mixer.Channel(index)
+        channel.play(sound)
+        self.voices[index] = (priority, now)
+        self.triggered += 1
+        return channel
+
+    def find_channel(self, priority):
+        busy = []
+        for index in range(self.channels):
+            if not pygame.mixer.Channel(index).get_busy():
+                self.voices.pop(index, None)
+                return index
+            busy.append((self.voices.get(index, (0, 0.0)), index))
+
+        # Вытесняем самый низкоприоритетный и самый старый голос
+        (victim_priority, started), victim = min(busy)
+        if victim_priority > priority:
+            return None
+        pygame.mixer.Channel(victim).stop()
+        self.stolen += 1
+        return victim
+
+    def active_voices(self):
+        if not pygame.mixer.get_init():
+            return 0
+        return sum(pygame.mixer.Channel(index).get_busy() for index in range(self.channels))
+
+    def metrics(self):
+        decoded = 0
+        if pygame.mixer.get_init():
+            frequency, size, channels = pygame.mixer.get_init()
+            for name, asset in self.assets.loaded.items():
+                if self.assets.specs[name][0] == 'sound' and isinstance(asset, pygame.mixer.Sound):
+                    decoded += int(asset.get_length() * frequency) * abs(size) // 8 * channels
+        return {
+            'active_voices': self.active_voices(),
+            'channels': self.channels,
+            'decoded_bytes': decoded,
+            'music': self.music,
+            'triggered': self.triggered,
+            'deduplicated': self.deduplicated,
+            'stolen': self.stolen,
+            'dropped': self.dropped,
+        }
@@ -0,0 +1,79 @@
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pythonWalk as game
+
+
+def build(count, seed, swarm):
+    # Каждый враг в своей клетке, чтобы слой не схлопывался по
+    # self.occupants: на экране действительно count спрайтов
+    maze = game.Maze(game.WIDTH, game.HEIGHT, 1, seed=seed)
+    maze.enemies = []
+    maze.occupants = {}
+    if swarm:
+        maze.spawn_swarm(count, seed)
+        return maze, len(list(maze.swarm.alive_positions()))
+
+    spots = game.mazegen.CellSampler(maze.open_cells, maze.rng)
+    for _ in range(count):
+        index = spots.take()
+        if index is None:
+            break
+        maze.add_enemy(game.Enemy(index % maze.width, index // maze.width, maze, 1))
+    return maze, len(maze.enemies)
+
+
+def draw_each(maze):
+    rects = []
+    if maze.swarm is not None:
+        image = game.sprite('enemy')
+        offset = game.SPRITE_OFFSETS['enemy']
+        for x, y in maze.swarm.alive_positions():
+            rects.append(game.screen.blit(image, (x * game.CELL_SIZE + offset, y * game.CELL_SIZE + offset)))
+        return rects
+    for enemy in maze.enemies:
+        rects.append(enemy.draw(maze.camera))
+    return rects
+
+
+def measure(draw, maze, frames):
+    background = maze.render_static()
+    start = time.perf_counter()
+    for _ in range(frames):
+        game.screen.blit(background, (0, 0))
+        draw(maze)
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время отрисовки актёров: по одному или слоями через screen.blits')
+    parser.add_argument('--counts', nargs='+', type=int, default=[10, 100, 1000, 5000])
+    parser.add_argument('--view', nargs=2, type=int, default=[5120, 3200], help='размер окна в пикселях')
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--swarm', action='store_true', help='враги роя на массивах numpy вместо объектов')
+    parser.add_argument('--fallback', action='store_true', help='рисовать заменители вместо картинок')
+    args = parser.parse_args()
+    game.WIDTH, game.HEIGHT = args.view
+    game.init_display()
+    if args.fallback:
+        for name in game.SPRITE_OFFSETS:
+            game.assets.loaded[name] = None
+
+    print(f'окно {args.view[0]}x{args.view[1]}, {"рой" if args.swarm else "объекты"}')
+    print(f'{"врагов":>8}{"по одному, мс":>16}{"слоями, мс":>13}{"ускорение":>12}')
+    for count in args.counts:
+        maze, placed = build(count, args.seed, args.swarm)
+        # Время фона (один blit всего окна) вычитается, остаётся цена актёров
+        background = measure(lambda maze: None, maze, args.frames)
+        each = measure(draw_each, maze, args.frames) - background
+        layered = measure(game.Maze.draw_actors, maze, args.frames) - background
+        print(f'{placed:>8}{each * 1000:>16.3f}{layered * 1000:>13.3f}{each / max(layered, 1e-9):>11.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pythonWalk as game
+
+
+def build(size, level, count, seed):
+    random.seed(seed)
+    maze = game.Maze(size * game.CELL_SIZE, size * game.CELL_SIZE, level, seed=seed)
+    maze.spawn_swarm(count, seed=seed)
+    maze.enemies = []
+    maze.occupants = {}
+    for x, y in maze.swarm.alive_positions():
+        maze.add_enemy(game.Enemy(x, y, maze, level))
+    return maze
+
+
+def run_objects(maze, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for enemy in maze.enemies:
+            enemy.move()
+    return time.perf_counter() - start
+
+
+def run_swarm(maze, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        maze.swarm.move()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Враги-объекты против роя на массивах numpy')
+    parser.add_argument('--size', type=int, default=401, help='размер лабиринта в клетках')
+    parser.add_argument('--counts', nargs='+', type=int, default=[100, 1000, 10000, 50000])
+    parser.add_argument('--level', type=int, default=5)
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"врагов":>8}{"объекты, мс/тик":>18}{"рой, мс/тик":>14}{"ускорение":>12}')
+    for count in args.counts:
+        maze = build(args.size, args.level, count, args.seed)
+        objects = run_objects(maze, args.ticks) / args.ticks
+        batched = run_swarm(maze, args.ticks) / args.ticks
+        print(f'{len(maze.enemies):>8}{objects * 1000:>18.3f}{batched * 1000:>14.3f}{objects / batched:>11.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import pythonWalk as game
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Игра без файлов ресурсов: звуки молчат, картинки заменяются')
+    parser.add_argument('--missing', nargs='+', help='какие ресурсы убрать (по умолчанию все)')
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    missing = args.missing or list(game.assets.specs)
+    directory = tempfile.mkdtemp()
+    game.assets.cache_dir = None
+    for name in missing:
+        kind, path, param = game.assets.specs[name]
+        game.assets.specs[name] = (kind, os.path.join(directory, os.path.basename(path)), param)
+
+    game.init_display()
+    game.assets.prefetch()
+    start = time.perf_counter()
+    try:
+        game.audio.play_music(os.path.join(directory, 'theme.mp3'), 0.5)
+        sim = game.Simulation(5, seed=args.seed)
+        renderer = game.DirtyRenderer(game.screen)
+        renderer.set_background(sim.maze.render_static())
+        for frame in range(args.frames):
+            sim.step([('attack',)] if frame % 30 == 0 else [])
+            for name, (kind, path, param) in game.assets.specs.items():
+                if kind == 'sound':
+                    game.audio.last_played.pop(name, None)
+                    game.audio.play(name)
+            renderer.begin()
+            rects = sim.maze.draw_actors()
+            rects += sim.player.draw(sim.maze.camera)
+            rects += game.draw_hud(sim.player, sim.level)
+            renderer.present(rects)
+    except Exception:
+        traceback.print_exc()
+        print('Игра упала без ресурсов: ' + ', '.join(missing))
+        sys.exit(1)
+    finally:
+        pygame.quit()
+
+    print(f'без ресурсов ({", ".join(missing)}): {args.frames} кадров за {time.perf_counter() - start:.2f} с, '
+          f'заменители: {", ".join(sorted(game.fallback_sprites))}')
+
+
+if __name__ == '__main__':
+    main()
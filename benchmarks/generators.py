@@ -0,0 +1,40 @@
+import argparse
+import time
+import tracemalloc
+
+import mazegen
+
+
+def measure(algorithm, width, height, seed, memory=False):
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    mazegen.generate(width, height, algorithm, seed=seed)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Скорость генерации лабиринтов')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100, 500, 2000])
+    parser.add_argument('--algorithms', nargs='+', choices=sorted(mazegen.GENERATORS),
+                        default=list(mazegen.GENERATORS))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--memory', action='store_true', help='замерить пиковую память (медленнее)')
+    args = parser.parse_args()
+
+    print(f'{"алгоритм":<10}{"размер":>12}{"время, с":>12}{"клеток/с":>14}{"память, МБ":>12}')
+    for size in args.sizes:
+        for algorithm in args.algorithms:
+            elapsed, peak = measure(algorithm, size, size, args.seed, args.memory)
+            memory = f'{peak / 2 ** 20:.1f}' if args.memory else '-'
+            print(f'{algorithm:<10}{f"{size}x{size}":>12}{elapsed:>12.3f}'
+                  f'{size * size / elapsed:>14,.0f}{memory:>12}')
+
+
+if __name__ == '__main__':
+    main()
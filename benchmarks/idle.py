@@ -0,0 +1,99 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import pythonWalk as game
+
+
+class Meter:
+    def __init__(self):
+        self.start = None
+
+    def begin(self):
+        self.start = (time.perf_counter(), time.process_time())
+
+    def result(self):
+        wall, cpu = time.perf_counter() - self.start[0], time.process_time() - self.start[1]
+        return cpu / wall, wall
+
+
+def measure_menu(duration):
+    game.init_display()
+    meter = Meter()
+    pygame.time.set_timer(pygame.QUIT, int(duration * 1000), 1)
+    meter.begin()
+    game.select_level(pygame.time.Clock(), game.LevelSelectScreen())
+    return meter.result()
+
+
+def measure_game(duration, level, game_over=False):
+    # Игра без ввода: экран выбора сразу возвращает уровень, а через
+    # duration секунд приходит QUIT
+    meter = Meter()
+    start_level = game.start_level
+
+    def select_level(clock, level_screen):
+        if meter.start is not None:
+            return None
+        pygame.time.set_timer(pygame.QUIT, int(duration * 1000), 1)
+        meter.begin()
+        return level
+
+    def start_idle_level(level):
+        sim = start_level(level)
+        if game_over:
+            sim.game_over = True
+            sim.game_over_message = 'JavaScript победил!'
+        return sim
+
+    game.select_level = select_level
+    game.start_level = start_idle_level
+    try:
+        game.main()
+    except SystemExit:
+        pass
+    finally:
+        game.start_level = start_level
+    return meter.result()
+
+
+SCENARIOS = {
+    'menu': ('меню', lambda duration: measure_menu(duration)),
+    'level1': ('уровень 1', lambda duration: measure_game(duration, 1)),
+    'level5': ('уровень 5', lambda duration: measure_game(duration, 5)),
+    'game-over': ('конец игры', lambda duration: measure_game(duration, 1, game_over=True)),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Загрузка процессора в простое: меню, игра без ввода, экран окончания')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--fixed', action='store_true', help='прежний ритм: clock.tick(60) и перерисовка каждый кадр')
+    parser.add_argument('--scenario', choices=list(SCENARIOS), help='один сценарий в этом процессе')
+    args = parser.parse_args()
+
+    if args.scenario:
+        game.ADAPTIVE_PACING = not args.fixed
+        load, wall = SCENARIOS[args.scenario][1](args.duration)
+        print(load)
+        return
+
+    # Каждый сценарий - в отдельном процессе: main() закрывает pygame и фабрику уровней
+    print(f'{"сценарий":<12}{"процессор":>10}')
+    for scenario, (name, _) in SCENARIOS.items():
+        command = [sys.executable, '-m', 'benchmarks.idle', '--scenario', scenario, '--duration', str(args.duration)]
+        if args.fixed:
+            command.append('--fixed')
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        print(f'{name:<12}{float(output.split()[-1]):>10.1%}')
+
+
+if __name__ == '__main__':
+    main()
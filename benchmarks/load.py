@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import replay
+import server as protocol
+
+
+class Counters:
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.games = 0
+
+
+async def request(reader, writer, payload, kind):
+    writer.write(protocol.frame(payload))
+    buffer = bytearray()
+    while True:
+        data = await reader.read(65536)
+        if not data:
+            raise ConnectionError('Сервер закрыл соединение')
+        buffer += data
+        for message in protocol.split_frames(buffer):
+            if message[0] == kind:
+                return message
+
+
+async def client(host, port, index, level, deadline, counters, move_every):
+    # Имитация игрока: нажатие раз в move_every тиков, случайные ответы,
+    # новая игра после окончания
+    rng = random.Random(index)
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(protocol.frame(protocol.HELLO_MESSAGE.pack(protocol.HELLO, level, index + 1)))
+    buffer = bytearray()
+    answers = 0
+
+    async def receive():
+        nonlocal answers
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            counters.bytes += len(data)
+            buffer.extend(data)
+            for message in protocol.split_frames(buffer):
+                counters.frames += 1
+                if message[0] == protocol.QUIZ:
+                    answers = message[1:].decode('utf-8').count(protocol.SEPARATOR)
+                    writer.write(protocol.frame(bytes((protocol.COMMAND, replay.ANSWER, rng.randrange(answers)))))
+                elif message[0] == protocol.OVER:
+                    counters.games += 1
+                    writer.write(protocol.frame(protocol.HELLO_MESSAGE.pack(protocol.HELLO, level, rng.randrange(1, 2 ** 32))))
+
+    task = asyncio.create_task(receive())
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(move_every / 60 * (0.5 + rng.random()))
+        writer.write(protocol.frame(bytes((protocol.COMMAND, rng.randrange(replay.ANSWER)))))
+    task.cancel()
+    writer.close()
+
+
+async def stalled(host, port, index, level, deadline):
+    # Клиент, который начал игру и перестал читать: сервер не должен
+    # копить для него дельты
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect((host, port))
+    reader, writer = await asyncio.open_connection(sock=sock, limit=1024)
+    writer.transport.pause_reading()
+    writer.write(protocol.frame(protocol.HELLO_MESSAGE.pack(protocol.HELLO, level, index + 1)))
+    await asyncio.sleep(deadline - time.perf_counter())
+    return writer
+
+
+async def run(args):
+    counters = Counters()
+    deadline = time.perf_counter() + args.duration
+    clients = [client(args.host, args.port, i, args.level, deadline, counters, args.move_every)
+               for i in range(args.sessions)]
+    clients += [stalled(args.host, args.port, args.sessions + i, args.level, deadline) for i in range(args.stalled)]
+    writers = [writer for writer in await asyncio.gather(*clients) if writer is not None]
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    stats = json.loads((await request(reader, writer, bytes((protocol.STATS,)), protocol.STATS))[1:])
+    writer.close()
+    for writer in writers:
+        writer.close()
+    return counters, stats
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f'Сервер {host}:{port} не запустился')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузка на сервер сессий: имитация клиентов')
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--level', type=int, default=5)
+    parser.add_argument('--move-every', type=int, default=8, help='тиков между нажатиями')
+    parser.add_argument('--stalled', type=int, default=0, help='сколько клиентов не читают ответы')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--connect', action='store_true', help='подключиться к уже запущенному серверу')
+    args = parser.parse_args()
+
+    process = None
+    if not args.connect:
+        process = subprocess.Popen([sys.executable, 'server.py', '--port', str(args.port), '--report', '0'],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.host, args.port)
+        counters, stats = asyncio.run(run(args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    p50, p95, p99 = stats['tick_ms']
+    print(f'сессий: {args.sessions}, тиков сервера: {stats["ticks"]}, пропущено: {stats["overruns"]}')
+    print(f'тик p50/p95/p99: {p50:.2f}/{p95:.2f}/{p99:.2f} мс, опоздание p99: {stats["lateness_ms"][2]:.2f} мс')
+    print(f'получено {counters.frames / args.duration:,.0f} кадров/с, {counters.bytes / args.duration / 1024:,.1f} КБ/с, '
+          f'{counters.bytes / max(counters.frames, 1):.1f} Б/кадр, завершено игр: {counters.games}')
+    if args.stalled:
+        print(f'не читают: {args.stalled}, на паузе: {stats["paused"]}, '
+              f'в буферах сервера: {stats["buffered_bytes"] / 1024:,.0f} КБ')
+
+
+if __name__ == '__main__':
+    main()
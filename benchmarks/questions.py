@@ -0,0 +1,52 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from questions import QuestionBank
+
+TAGS = ['python', 'алгоритмы', 'git', 'sql']
+
+
+def fill(bank, count):
+    rows = ((f'Вопрос {i}?', [f'ответ {i}', 'нет', 'не знаю', 'другое'], i % 5 + 1, TAGS[i % len(TAGS)])
+            for i in range(count))
+    return bank.add(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Банк вопросов SQLite: выбор без повторов')
+    parser.add_argument('--count', type=int, default=50000, help='вопросов в банке')
+    parser.add_argument('--draws', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        bank = QuestionBank(os.path.join(directory, 'questions.db'))
+        start = time.perf_counter()
+        fill(bank, args.count)
+        print(f'заполнение: {time.perf_counter() - start:.2f} с, {len(bank)} вопросов')
+
+        print(f'{"фильтр":<24}{"доступно":>10}{"мкс/вопрос":>12}{"память, КБ":>12}')
+        for name, levels, tags in (('все', None, None),
+                                   ('уровни 1-3', range(1, 4), None),
+                                   ('уровень 5, sql', [5], ['sql'])):
+            tracemalloc.start()
+            session = bank.session(levels, tags, seed=args.seed)
+            available = len(session)
+            draws = min(args.draws, available)
+            seen = set()
+            start = time.perf_counter()
+            for _ in range(draws):
+                seen.add(session.draw()[0])
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            assert len(seen) == draws, 'вопросы повторились'
+            print(f'{name:<24}{available:>10}{elapsed * 1e6 / max(draws, 1):>12.1f}{peak / 1024:>12.1f}')
+        bank.close()
+
+
+if __name__ == '__main__':
+    main()
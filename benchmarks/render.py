@@ -0,0 +1,78 @@
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import pythonWalk as game
+
+
+def frame_full(maze, player, renderer):
+    game.screen.fill(game.MAIN_COLOR)
+    maze.draw_walls(game.screen)
+    maze.draw_actors()
+    player.draw()
+    game.draw_hud(player, maze.level)
+    pygame.display.flip()
+
+
+def frame_static(maze, player, renderer):
+    maze.draw()
+    player.draw()
+    game.draw_hud(player, maze.level)
+    pygame.display.flip()
+
+
+def frame_dirty(maze, player, renderer):
+    renderer.begin()
+    rects = maze.draw_actors()
+    rects += player.draw()
+    rects += game.draw_hud(player, maze.level)
+    renderer.present(rects)
+
+
+MODES = {
+    'full': frame_full,
+    'static': frame_static,
+    'dirty': frame_dirty,
+}
+
+
+def measure(frame, level, frames, seed):
+    maze = game.Maze(game.WIDTH, game.HEIGHT, level, seed=seed)
+    player = game.Player(maze)
+    renderer = game.DirtyRenderer(game.screen)
+    renderer.set_background(maze.render_static())
+
+    start = time.perf_counter()
+    for tick in range(frames):
+        player.update()
+        if tick % 30 == 0:
+            player.attack()
+        for enemy in maze.enemies:
+            enemy.move()
+        frame(maze, player, renderer)
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время кадра: полная перерисовка и грязные прямоугольники')
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--level', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    game.init_display()
+
+    baseline = None
+    print(f'{"режим":<10}{"мс/кадр":>12}{"ускорение":>12}')
+    for name, frame in MODES.items():
+        per_frame = measure(frame, args.level, args.frames, args.seed)
+        baseline = baseline or per_frame
+        print(f'{name:<10}{per_frame * 1000:>12.3f}{baseline / per_frame:>11.1f}x')
+
+
+if __name__ == '__main__':
+    main()
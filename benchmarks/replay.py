@@ -0,0 +1,65 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pythonWalk as game
+
+COMMANDS = list(game.KEY_COMMANDS.values())
+
+
+def record(path, level, ticks, seed):
+    # Сценарная сессия: случайные нажатия и ответы, как у живого игрока
+    rng = random.Random(seed)
+    sim = game.Simulation(level, seed=seed)
+    sim.record(path)
+    while sim.tick_count < ticks and not sim.game_over:
+        commands = []
+        if sim.quiz_active:
+            commands.append(('answer', sim.correct_answer if rng.random() < 0.9 else rng.choice(sim.current_answers)))
+        elif rng.random() < 0.3:
+            commands.append(rng.choice(COMMANDS))
+        sim.step(commands)
+    sim.stop_recording()
+    return sim
+
+
+def run(path, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        sim, matched = game.play_log(path)
+        if not matched:
+            print(f'Расхождение с записью после {sim.tick_count} тиков')
+            sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    ticks = sim.tick_count * repeat
+    print(f'{ticks / elapsed:,.0f} тиков/с, в {ticks / 60 / elapsed:,.0f} раз быстрее реального времени (60 кадров/с)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Воспроизведение записанной сессии без окна')
+    parser.add_argument('log', nargs='?', help='файл записи (.pwr); без него запись создаётся сценарием')
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--level', type=int, default=5)
+    parser.add_argument('--ticks', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.log is not None:
+        run(args.log, args.repeat)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'session.pwr')
+        recorded = record(path, args.level, args.ticks, args.seed)
+        print(f'записано {recorded.tick_count} тиков, {os.path.getsize(path)} байт')
+        run(path, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import os
+import pickle
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pythonWalk as game
+import savegame
+
+COMMANDS = list(game.KEY_COMMANDS.values())
+
+
+def play(sim, rng, ticks):
+    for _ in range(ticks):
+        commands = []
+        if sim.quiz_active:
+            commands.append(('answer', sim.correct_answer))
+        elif rng.random() < 0.3:
+            commands.append(rng.choice(COMMANDS))
+        sim.step(commands)
+
+
+def check(level, seed, ticks):
+    # Продолжение из сохранения должно совпасть с продолжением исходной игры
+    sim = game.Simulation(level, seed=seed)
+    play(sim, random.Random(seed), ticks)
+    restored = game.Simulation.restore(savegame.loads(savegame.dumps(sim.checkpoint())))
+    play(sim, random.Random(seed + 1), ticks)
+    play(restored, random.Random(seed + 1), ticks)
+    return sim.state() == restored.state()
+
+
+def measure(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Скорость сохранения и загрузки игры для лабиринтов разного размера')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[20, 101, 501, 1001], help='сторона лабиринта в клетках')
+    parser.add_argument('--level', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for level in range(1, 6):
+        if not check(level, args.seed + level, 600):
+            print(f'Уровень {level}: игра из сохранения разошлась с исходной')
+            sys.exit(1)
+
+    print(f'{"клеток":>10}{"байт":>12}{"сохранение, мс":>16}{"загрузка, мс":>14}{"восстановление, мс":>20}'
+          f'{"pickle, байт":>14}{"pickle, мс":>12}')
+    for size in args.sizes:
+        snapshot = game.build_level(args.level, (size * game.CELL_SIZE, size * game.CELL_SIZE), args.seed)
+        sim = game.Simulation(args.level, snapshot=snapshot)
+        checkpoint = sim.checkpoint()
+
+        dump_ms, data = measure(lambda: savegame.dumps(sim.checkpoint()), args.repeat)
+        load_ms, loaded = measure(lambda: savegame.loads(data), args.repeat)
+        restore_ms, restored = measure(lambda: game.Simulation.restore(loaded), args.repeat)
+        if restored.state() != sim.state():
+            print(f'{size}x{size}: состояние после загрузки отличается')
+            sys.exit(1)
+        pickle_ms, pickled = measure(lambda: pickle.loads(pickle.dumps(checkpoint, pickle.HIGHEST_PROTOCOL)), args.repeat)
+        pickle_size = len(pickle.dumps(checkpoint, pickle.HIGHEST_PROTOCOL))
+        print(f'{size * size:>10,}{len(data):>12,}{dump_ms:>16.2f}{load_ms:>14.2f}{restore_ms:>20.2f}'
+              f'{pickle_size:>14,}{pickle_ms:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
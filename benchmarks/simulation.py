@@ -0,0 +1,57 @@
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pythonWalk as game
+
+COMMANDS = list(game.KEY_COMMANDS.values())
+
+
+def run(level, ticks, seed, hunters=None):
+    rng = random.Random(seed)
+    sim = game.Simulation(level, seed=seed, hunters=hunters)
+    games = 1
+    recomputes = 0
+    field_time = 0.0
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if sim.game_over:
+            if sim.hunters:
+                recomputes += sim.maze.hunt_field.recomputes
+                field_time += sim.maze.hunt_field.total_time
+            sim = game.Simulation(level, seed=rng.randrange(2 ** 32), hunters=hunters)
+            games += 1
+        elif sim.quiz_active:
+            sim.apply(('answer', sim.correct_answer))
+        elif rng.random() < 0.1:
+            sim.apply(rng.choice(COMMANDS))
+        sim.step()
+    elapsed = time.perf_counter() - start
+    if sim.hunters:
+        recomputes += sim.maze.hunt_field.recomputes
+        field_time += sim.maze.hunt_field.total_time
+    return elapsed, games, recomputes, field_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Скорость симуляции без отрисовки')
+    parser.add_argument('--ticks', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--hunters', action='store_const', const=True,
+                        help='охотники на всех уровнях (по умолчанию - на уровнях из HUNTER_LEVELS)')
+    args = parser.parse_args()
+
+    print(f'{"уровень":<10}{"тиков/с":>14}{"игр":>8}{"пересчётов":>12}{"мс/пересчёт":>14}')
+    for level in range(1, 6):
+        elapsed, games, recomputes, field_time = run(level, args.ticks, args.seed, args.hunters)
+        per_recompute = f'{field_time * 1000 / recomputes:.3f}' if recomputes else '-'
+        print(f'{level:<10}{args.ticks / elapsed:>14,.0f}{games:>8}{recomputes:>12}{per_recompute:>14}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def child(mode, cache_dir):
+    start = time.perf_counter()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    import pygame
+    import pythonWalk as game
+
+    game.assets.cache_dir = cache_dir
+    game.init_display()
+    if mode == 'eager':
+        for name in game.assets.specs:
+            game.assets.get(name)
+    else:
+        game.assets.prefetch()
+
+    game.LevelSelectScreen().draw(game.screen)
+    pygame.display.flip()
+    first_frame = time.perf_counter() - start
+
+    for name in game.assets.specs:
+        game.assets.get(name)
+    all_assets = time.perf_counter() - start
+    print(json.dumps({'first_frame': first_frame, 'all_assets': all_assets}))
+
+
+def measure(mode, cache_dir):
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.startup', '--child', mode, cache_dir or ''],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время до первого кадра')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'CACHE'), help=argparse.SUPPRESS)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1] or None)
+        return
+
+    cache_dir = tempfile.mkdtemp(prefix='pgy-assets-')
+    try:
+        print(f'{"режим":<34}{"первый кадр, мс":>18}{"все ресурсы, мс":>18}')
+        for title, mode, cache, clear in [('сразу, без кэша (как раньше)', 'eager', None, False),
+                                           ('лениво, холодный кэш', 'lazy', cache_dir, True),
+                                           ('лениво, тёплый кэш', 'lazy', cache_dir, False)]:
+            results = []
+            for _ in range(args.runs):
+                if clear:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                results.append(measure(mode, cache))
+            first = min(result['first_frame'] for result in results)
+            total = min(result['all_assets'] for result in results)
+            print(f'{title:<34}{first * 1000:>18.1f}{total * 1000:>18.1f}')
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import pythonWalk as game
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+COMMANDS = list(game.KEY_COMMANDS.values())
+
+
+def new_maze(size, level, seed):
+    random.seed(seed)
+    return game.Maze(size * game.CELL_SIZE, size * game.CELL_SIZE, level, seed=seed)
+
+
+def generate(size):
+    def setup(seed):
+        maze = new_maze(size, 1, seed)
+        return maze.generate_maze, 5
+    return setup
+
+
+def place_artifacts(seed):
+    maze = new_maze(101, 1, seed)
+    return maze.place_artifacts, 200
+
+
+def place_enemies(seed):
+    maze = new_maze(101, 5, seed)
+
+    def run():
+        maze.enemies = []
+        maze.occupants = {}
+        maze.place_enemies(50)
+    return run, 50
+
+
+def enemy_move(count):
+    def setup(seed):
+        maze = new_maze(201, 5, seed)
+        maze.enemies = []
+        maze.occupants = {}
+        maze.place_enemies(count)
+
+        def run():
+            for enemy in maze.enemies:
+                enemy.move()
+        return run, 100
+    return setup
+
+
+def player_attack(seed):
+    # Вокруг игрока плотная группа врагов (по два в каждой открытой клетке
+    # радиуса удара), и перед каждым ударом убитые возвращаются: иначе
+    # после первого вызова удар приходится по пустым клеткам. Окно
+    # дедупликации звука сбрасывается, чтобы звук шёл по полному пути
+    maze = new_maze(101, 5, seed)
+    maze.place_enemies(500)
+    player = game.Player(maze)
+    cluster = []
+    for dx, dy in game.ATTACK_CELLS:
+        x, y = player.x + dx, player.y + dy
+        if maze.is_open(x, y):
+            for _ in range(2):
+                enemy = game.Enemy(x, y, maze, maze.level)
+                maze.add_enemy(enemy)
+                cluster.append(enemy)
+
+    def run():
+        for enemy in cluster:
+            if not enemy.is_alive:
+                enemy.is_alive = True
+                maze.occupants.setdefault((enemy.x, enemy.y), []).append(enemy)
+        game.audio.last_played.pop('attack', None)
+        player.attack_cooldown = 0
+        player.attack()
+    return run, 2000
+
+
+def maze_draw(seed):
+    maze = new_maze(game.WIDTH // game.CELL_SIZE, 5, seed)
+    maze.render_static()
+    return maze.draw, 500
+
+
+def button_draw(seed):
+    button = game.Button(game.WIDTH // 2 - 100, 200, 200, 50, 'Уровень 1', game.COLORS_SET[0], game.YELLOW)
+    hover = [False]
+
+    def run():
+        hover[0] = not hover[0]
+        button.is_hovered = hover[0]
+        button.draw(game.screen)
+    return run, 5000
+
+
+def game_loop(seed):
+    random.seed(seed)
+    rng = random.Random(seed)
+    sim = game.Simulation(5, seed=seed)
+    renderer = game.DirtyRenderer(game.screen)
+    renderer.set_background(sim.maze.render_static())
+    quiz_screen = game.QuizScreen()
+
+    def run():
+        nonlocal sim
+        if sim.game_over:
+            sim = game.Simulation(5, seed=rng.randrange(2 ** 32))
+            renderer.set_background(sim.maze.render_static())
+        commands = []
+        if sim.quiz_active:
+            commands.append(('answer', sim.correct_answer))
+        elif rng.random() < 0.2:
+            commands.append(rng.choice(COMMANDS))
+        sim.step(commands)
+
+        renderer.begin(overlay=sim.quiz_active)
+        rects = sim.maze.draw_actors()
+        rects += sim.player.draw(sim.maze.camera)
+        rects += game.draw_hud(sim.player, sim.level)
+        if sim.quiz_active:
+            quiz_screen.show(sim.current_question, sim.current_answers)
+            quiz_screen.draw(game.screen)
+        renderer.present(rects)
+    return run, 1000
+
+
+CASES = {
+    'generate_maze[51]': generate(51),
+    'generate_maze[201]': generate(201),
+    'generate_maze[501]': generate(501),
+    'place_artifacts': place_artifacts,
+    'place_enemies[50]': place_enemies,
+    'enemy_move[100]': enemy_move(100),
+    'enemy_move[1000]': enemy_move(1000),
+    'player_attack': player_attack,
+    'maze_draw': maze_draw,
+    'button_draw': button_draw,
+    'game_loop': game_loop,
+}
+
+
+def measure(setup, seed, repeat):
+    run, number = setup(seed)
+    run()
+
+    times = []
+    for i in range(repeat):
+        random.seed(seed + i)
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        times.append((time.perf_counter() - start) / number)
+    return {
+        'ops': number,
+        'median_ms': statistics.median(times) * 1000,
+        'min_ms': min(times) * 1000,
+        'max_ms': max(times) * 1000,
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f'{"тест":<22}{"база, мс":>12}{"сейчас, мс":>12}{"изменение":>12}')
+    for name, result in results.items():
+        if name not in baseline:
+            print(f'{name:<22}{"-":>12}{result["median_ms"]:>12.4f}{"новый":>12}')
+            continue
+        before = baseline[name]['median_ms']
+        change = result['median_ms'] / before - 1 if before else 0.0
+        mark = ' !' if change > threshold else ''
+        print(f'{name:<22}{before:>12.4f}{result["median_ms"]:>12.4f}{change:>+11.1%}{mark}')
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Набор бенчмарков с JSON-результатами и сравнением с базой')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', choices=list(CASES), help='запустить только эти тесты')
+    parser.add_argument('--output', help='куда записать результаты в JSON')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='записать результаты как новую базу')
+    parser.add_argument('--threshold', type=float, default=0.2, help='допустимое замедление медианы (0.2 = 20%%)')
+    args = parser.parse_args()
+    game.init_display()
+
+    results = {}
+    for name in args.only or CASES:
+        results[name] = measure(CASES[name], args.seed, args.repeat)
+        print(f'{name:<22}{results[name]["median_ms"]:>12.4f} мс', file=sys.stderr)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f'База {args.baseline} не найдена, сравнение пропущено (--save-baseline создаст её)')
+        return
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)['results']
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f'Регрессии: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
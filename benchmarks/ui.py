@@ -0,0 +1,110 @@
+import argparse
+import os
+import sys
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import pythonWalk as game
+
+
+class CountingSurface(pygame.Surface):
+    created = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingSurface.created += 1
+
+
+def frame_menu(state, tick):
+    screen = state['level_screen']
+    screen.update_hover((game.WIDTH // 2, 225 + (tick % 5) * 70))
+    screen.draw(game.screen)
+
+
+def frame_quiz(state, tick):
+    sim = state['sim']
+    quiz = state['quiz_screen']
+    quiz.update_hover((game.WIDTH // 2, 225 + (tick % 4) * 70))
+    quiz.show(sim.current_question, sim.current_answers)
+    state['renderer'].begin(overlay=True)
+    rects = sim.maze.draw_actors()
+    rects += sim.player.draw(sim.maze.camera)
+    rects += game.draw_hud(sim.player, sim.level)
+    quiz.draw(game.screen)
+    state['renderer'].present(rects)
+
+
+def frame_game_over(state, tick):
+    screen = state['game_over_screen']
+    screen.update_hover((game.WIDTH // 2, game.HEIGHT // 2 + 75 + (tick % 2) * 70))
+    screen.show(state['sim'].game_over_message)
+    screen.draw(game.screen)
+
+
+MODES = {
+    'menu': frame_menu,
+    'quiz': frame_quiz,
+    'game_over': frame_game_over,
+}
+
+
+def prepare(seed):
+    sim = game.Simulation(1, seed=seed)
+    question, answers = sim.questions.draw()
+    sim.quiz_active = True
+    sim.current_question, sim.current_answers = question, list(answers)
+    sim.game_over_message = 'Вы победили!'
+    renderer = game.DirtyRenderer(game.screen)
+    renderer.set_background(sim.maze.render_static())
+    return {
+        'sim': sim,
+        'renderer': renderer,
+        'level_screen': game.LevelSelectScreen(),
+        'quiz_screen': game.QuizScreen(),
+        'game_over_screen': game.GameOverScreen(),
+    }
+
+
+def measure(frame, state, frames):
+    for tick in range(10):
+        frame(state, tick)
+
+    CountingSurface.created = 0
+    peak = 0
+    tracemalloc.start()
+    for tick in range(frames):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        frame(state, tick)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return CountingSurface.created / frames, peak, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Выделения памяти на кадр в меню, викторине и финальном экране')
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-bytes', type=int, default=4096,
+                        help='допустимый пик временных выделений за кадр')
+    args = parser.parse_args()
+    game.init_display()
+    pygame.Surface = CountingSurface
+
+    state = prepare(args.seed)
+    failed = False
+    print(f'{"экран":<12}{"Surface/кадр":>14}{"пик, Б":>10}{"удержано, Б":>14}')
+    for name, frame in MODES.items():
+        surfaces, peak, retained = measure(frame, state, args.frames)
+        print(f'{name:<12}{surfaces:>14.2f}{peak:>10}{retained:>14}')
+        failed = failed or surfaces > 0 or peak > args.max_bytes
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pythonWalk as game
+
+RIGHT_TURNS = {(1, 0): (0, 1), (0, 1): (-1, 0), (-1, 0): (0, -1), (0, -1): (1, 0)}
+
+
+def wall_follower(maze, player, heading):
+    right = RIGHT_TURNS[heading]
+    for step in (right, heading, (-right[0], -right[1]), (-heading[0], -heading[1])):
+        if maze.is_open(player.x + step[0], player.y + step[1]):
+            return step
+    return heading
+
+
+def run(chunks, level, frames, seed):
+    sim = game.Simulation(level, seed=seed, world=(chunks, chunks))
+    renderer = game.DirtyRenderer(game.screen)
+    renderer.set_background(sim.maze.render_static())
+    heading = (1, 0)
+    max_chunks = max_enemies = 0
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(frames):
+        heading = wall_follower(sim.maze, sim.player, heading)
+        sim.player.move(*heading)
+        sim.step()
+        if sim.maze.follow(sim.player.x, sim.player.y):
+            renderer.set_background(sim.maze.render_static())
+        renderer.begin()
+        rects = sim.maze.draw_actors()
+        rects += sim.player.draw(sim.maze.camera)
+        renderer.present(rects)
+        max_chunks = max(max_chunks, len(sim.maze.chunks.chunks))
+        max_enemies = max(max_enemies, len(sim.maze.enemies))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed / frames, max_chunks, max_enemies, sim.maze.chunks.generated, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Мир из чанков: стоимость кадра и память от размера мира')
+    parser.add_argument('--chunks', nargs='+', type=int, default=[4, 64, 1024, 65536],
+                        help='сторона мира в чанках')
+    parser.add_argument('--level', type=int, default=3)
+    parser.add_argument('--frames', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    game.init_display()
+
+    print(f'{"мир, клеток":>16}{"мс/кадр":>10}{"чанков":>8}{"врагов":>8}{"сгенерировано":>15}{"пик, КБ":>10}')
+    for chunks in args.chunks:
+        per_frame, loaded, enemies, generated, peak = run(chunks, args.level, args.frames, args.seed)
+        side = chunks * game.CHUNK_SIZE
+        print(f'{f"{side}x{side}":>16}{per_frame * 1000:>10.3f}{loaded:>8}{enemies:>8}'
+              f'{generated:>15}{peak / 1024:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = parquet = None
+
+import pythonWalk as game
+
+STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+CAUSES = {
+    'Вы победили!': 'win',
+    'JavaScript победил!': 'enemy',
+    'Неправильный ответ!': 'wrong_answer',
+}
+COLUMNS = ['level', 'bot', 'seed', 'result', 'ticks', 'artifacts', 'first_artifact', 'artifact_ticks', 'kills']
+
+
+class RandomBot:
+    def __init__(self, rng, accuracy=0.8, move_every=8):
+        self.rng = rng
+        self.accuracy = accuracy
+        self.move_every = move_every
+
+    def answer(self, sim):
+        if self.rng.random() < self.accuracy:
+            return [('answer', sim.correct_answer)]
+        wrong = [answer for answer in sim.current_answers if answer != sim.correct_answer]
+        return [('answer', self.rng.choice(wrong or sim.current_answers))]
+
+    def act(self, sim):
+        if sim.quiz_active:
+            return self.answer(sim)
+        if sim.tick_count % self.move_every:
+            return []
+        player = sim.player
+        if player.attack_cooldown <= 0 and sim.maze.enemies_near(player.x, player.y):
+            return [('attack',)]
+        command = self.choose(sim)
+        return [command] if command else []
+
+    def choose(self, sim):
+        return ('move',) + self.rng.choice(STEPS)
+
+
+class SeekerBot(RandomBot):
+    # Идёт к ближайшему артефакту по полю расстояний и не наступает
+    # на врага, если не может его ударить
+    def choose(self, sim):
+        maze, player = sim.maze, sim.player
+        best = None
+        for x, y in maze.artifacts:
+            field = maze.distances_from(x, y)
+            distance = field.distance(player.x, player.y)
+            if distance >= 0 and (best is None or distance < best[0]):
+                best = (distance, field)
+        if best is None:
+            return ('move',) + self.rng.choice(STEPS)
+
+        step = best[1].descend(player.x, player.y)
+        if step is None or maze.enemy_at(player.x + step[0], player.y + step[1]):
+            return None
+        return ('move',) + step
+
+
+BOTS = {
+    'random': RandomBot,
+    'seeker': SeekerBot,
+}
+
+
+def play_game(task):
+    level, bot_name, seed, max_ticks, accuracy, move_every = task
+    sim = game.Simulation(level, seed=seed)
+    bot = BOTS[bot_name](random.Random(seed), accuracy, move_every)
+    alive = sum(enemy.is_alive for enemy in sim.maze.enemies)
+    artifact_ticks = []
+
+    while not sim.game_over and sim.tick_count < max_ticks:
+        quiz = sim.quiz_active
+        sim.step(bot.act(sim))
+        if sim.quiz_active and not quiz:
+            artifact_ticks.append(sim.tick_count)
+
+    return {
+        'level': level,
+        'bot': bot_name,
+        'seed': seed,
+        'result': CAUSES.get(sim.game_over_message, 'timeout'),
+        'ticks': sim.tick_count,
+        'artifacts': sim.player.artifacts_collected,
+        'first_artifact': artifact_ticks[0] if artifact_ticks else '',
+        'artifact_ticks': ';'.join(map(str, artifact_ticks)),
+        'kills': alive - sum(enemy.is_alive for enemy in sim.maze.enemies),
+    }
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    def __init__(self, path, batch=1000):
+        if parquet is None:
+            raise RuntimeError('Для записи в Parquet нужен пакет pyarrow')
+        self.path = path
+        self.batch = batch
+        self.rows = []
+        self.writer = None
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        table = pyarrow.Table.from_pylist([dict(row, first_artifact=row['first_artifact'] or None)
+                                           for row in self.rows])
+        if self.writer is None:
+            self.writer = parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Summary:
+    def __init__(self):
+        self.levels = {}
+
+    def add(self, row):
+        stats = self.levels.setdefault(row['level'], {'games': 0, 'ticks': 0, 'first': [], 'results': {}})
+        stats['games'] += 1
+        stats['ticks'] += row['ticks']
+        stats['results'][row['result']] = stats['results'].get(row['result'], 0) + 1
+        if row['first_artifact'] != '':
+            stats['first'].append(row['first_artifact'])
+
+    def print(self):
+        causes = ['win', 'enemy', 'wrong_answer', 'timeout']
+        print(f'{"уровень":<9}{"игр":>7}{"побед":>8}{"до артефакта, с":>17}' + ''.join(f'{cause:>14}' for cause in causes))
+        for level, stats in sorted(self.levels.items()):
+            games = stats['games']
+            first = sorted(stats['first'])
+            median = f'{first[len(first) // 2] / 60:.1f}' if first else '-'
+            print(f'{level:<9}{games:>7}{stats["results"].get("win", 0) / games:>8.1%}{median:>17}' +
+                  ''.join(f'{stats["results"].get(cause, 0) / games:>14.1%}' for cause in causes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пакетная оценка сложности уровней ботами')
+    parser.add_argument('--games', type=int, default=1000, help='игр на каждый уровень')
+    parser.add_argument('--levels', nargs='+', type=int, default=[1, 2, 3, 4, 5])
+    parser.add_argument('--bot', choices=list(BOTS), default='seeker')
+    parser.add_argument('--accuracy', type=float, default=0.8, help='доля правильных ответов бота')
+    parser.add_argument('--move-every', type=int, default=8, help='тиков между нажатиями')
+    parser.add_argument('--max-ticks', type=int, default=60 * 60 * 5)
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='файл результатов .csv или .parquet')
+    args = parser.parse_args()
+
+    # Банк вопросов заполняется до запуска пула, чтобы процессы не делали этого наперегонки
+    game.open_question_bank()
+    game.question_bank.close()
+
+    tasks = [(level, args.bot, args.seed * 1000003 + level * 100003 + i, args.max_ticks, args.accuracy, args.move_every)
+             for level in args.levels for i in range(args.games)]
+    sink = None
+    if args.output:
+        sink = ParquetSink(args.output) if args.output.endswith('.parquet') else CsvSink(args.output)
+    summary = Summary()
+
+    start = time.perf_counter()
+    ticks = 0
+    with multiprocessing.Pool(args.processes) as pool:
+        chunksize = max(1, len(tasks) // (args.processes * 16))
+        for done, row in enumerate(pool.imap_unordered(play_game, tasks, chunksize), 1):
+            summary.add(row)
+            ticks += row['ticks']
+            if sink is not None:
+                sink.write(row)
+            if done % 500 == 0:
+                print(f'{done}/{len(tasks)}', file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    if sink is not None:
+        sink.close()
+
+    summary.print()
+    print(f'{len(tasks) / elapsed:,.1f} игр/с, {ticks / elapsed:,.0f} тиков/с, процессов: {args.processes}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+import argparse
+import socket
+import sys
+
+import pygame
+
+import pythonWalk as game
+import server as protocol
+
+
+class RemoteGame:
+    def __init__(self):
+        self.width = self.height = 0
+        self.level = 1
+        self.cells = b''
+        self.player = (0, 0)
+        self.artifacts_collected = 0
+        self.flags = 0
+        self.artifacts = []
+        self.enemies = {}
+        self.question = ''
+        self.answers = []
+        self.message = ''
+        self.background = None
+
+    @property
+    def quiz_active(self):
+        return bool(self.flags & protocol.QUIZ_FLAG)
+
+    @property
+    def game_over(self):
+        return bool(self.flags & protocol.OVER_FLAG)
+
+    def apply(self, payload):
+        kind = payload[0]
+        if kind == protocol.INIT:
+            _, self.width, self.height, self.level = protocol.INIT_MESSAGE.unpack_from(payload)
+            self.cells = payload[protocol.INIT_MESSAGE.size:]
+            self.enemies = {}
+            self.flags = 0
+            self.background = self.render_background()
+        elif kind == protocol.STATE:
+            state = protocol.decode_state(payload)
+            self.player = state['player']
+            self.artifacts_collected = state['artifacts_collected']
+            self.flags = state['flags']
+            if state['artifacts'] is not None:
+                self.artifacts = state['artifacts']
+            for index, x, y in state['enemies']:
+                if x == protocol.DEAD:
+                    self.enemies.pop(index, None)
+                else:
+                    self.enemies[index] = (x, y)
+        elif kind == protocol.QUIZ:
+            self.question, *self.answers = payload[1:].decode('utf-8').split(protocol.SEPARATOR)
+        elif kind == protocol.OVER:
+            self.message = payload[1:].decode('utf-8')
+            self.flags |= protocol.OVER_FLAG
+        return kind
+
+    def render_background(self):
+        layer = pygame.Surface(game.screen.get_size()).convert()
+        layer.fill(game.MAIN_COLOR)
+        size = game.CELL_SIZE
+        for y in range(self.height):
+            for x in range(self.width):
+                if self.cells[y * self.width + x] == 1:
+                    pygame.draw.rect(layer, game.CONTRAST_COLOR, (x * size, y * size, size, size))
+                else:
+                    pygame.draw.rect(layer, game.MAIN_COLOR, (x * size, y * size, size, size), 1)
+        return layer
+
+    def draw(self):
+        size = game.CELL_SIZE
+        image = game.sprite('artifact')
+        offset = game.SPRITE_OFFSETS['artifact']
+        rects = game.screen.blits([(image, (x * size + offset, y * size + offset)) for x, y in self.artifacts])
+
+        image = game.sprite('enemy')
+        offset = game.SPRITE_OFFSETS['enemy']
+        rects += game.screen.blits([(image, (x * size + offset, y * size + offset)) for x, y in self.enemies.values()])
+
+        x, y = self.player
+        offset = game.SPRITE_OFFSETS['player']
+        layer = [(game.sprite('player'), (x * size + offset, y * size + offset))]
+        if self.flags & protocol.ATTACK_FLAG:
+            layer.append((game.attack_sprite(), (x * size + size // 2 - game.ATTACK_RADIUS,
+                                                 y * size + size // 2 - game.ATTACK_RADIUS)))
+        rects += game.screen.blits(layer)
+        return rects
+
+
+class Connection:
+    def __init__(self, host, port):
+        self.socket = socket.create_connection((host, port))
+        self.socket.setblocking(False)
+        self.buffer = bytearray()
+        self.closed = False
+
+    def send(self, payload):
+        self.socket.sendall(protocol.frame(payload))
+
+    def receive(self):
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except BlockingIOError:
+                break
+            if not data:
+                self.closed = True
+                break
+            self.buffer += data
+        return protocol.split_frames(self.buffer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Тонкий клиент сервера сессий')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--level', type=int, help='уровень без экрана выбора')
+    parser.add_argument('--seed', type=int, default=0, help='зерно уровня (0 - случайное)')
+    args = parser.parse_args()
+
+    game.init_display()
+    game.assets.prefetch()
+    clock = pygame.time.Clock()
+    level_screen = game.LevelSelectScreen()
+    quiz_screen = game.QuizScreen()
+    game_over_screen = game.GameOverScreen()
+
+    level = args.level or game.select_level(clock, level_screen)
+    if level is None:
+        pygame.quit()
+        sys.exit()
+
+    try:
+        connection = Connection(args.host, args.port)
+    except OSError as error:
+        print(f'Не удалось подключиться к {args.host}:{args.port}: {error}')
+        pygame.quit()
+        sys.exit(1)
+    connection.send(protocol.HELLO_MESSAGE.pack(protocol.HELLO, level, args.seed))
+    remote = RemoteGame()
+    renderer = game.DirtyRenderer(game.screen)
+
+    running = True
+    while running:
+        mouse_pos = pygame.mouse.get_pos()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            if remote.game_over:
+                game_over_screen.update_hover(mouse_pos)
+                if game_over_screen.restart_button.is_clicked(mouse_pos, event):
+                    level = game.select_level(clock, level_screen)
+                    if level is None:
+                        running = False
+                    else:
+                        remote.background = None
+                        connection.send(protocol.HELLO_MESSAGE.pack(protocol.HELLO, level, 0))
+                elif game_over_screen.exit_button.is_clicked(mouse_pos, event):
+                    running = False
+            elif remote.quiz_active:
+                for button in quiz_screen.buttons:
+                    button.check_hover(mouse_pos)
+                    if button.is_clicked(mouse_pos, event):
+                        connection.send(protocol.encode_command(('answer', button.text), remote.answers))
+            elif event.type == pygame.KEYDOWN and event.key in game.KEY_COMMANDS:
+                connection.send(protocol.encode_command(game.KEY_COMMANDS[event.key]))
+
+        for payload in connection.receive():
+            if remote.apply(payload) == protocol.INIT:
+                renderer.set_background(remote.background)
+        if connection.closed:
+            print('Сервер закрыл соединение')
+            running = False
+
+        if remote.background is not None:
+            renderer.begin(overlay=remote.game_over or remote.quiz_active)
+            rects = remote.draw()
+            rects += game.draw_hud(remote, remote.level)
+            if remote.game_over:
+                game_over_screen.show(remote.message)
+                game_over_screen.draw(game.screen)
+            elif remote.quiz_active:
+                quiz_screen.show(remote.question, remote.answers)
+                quiz_screen.draw(game.screen)
+            renderer.present(rects)
+        clock.tick(60)
+
+    pygame.quit()
+    sys.exit()
+
+
+if __name__ == '__main__':
+    main()
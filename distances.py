@@ -0,0 +1,111 @@
+import time
+from array import array
+from collections import deque
+
+UNREACHED = -1
+
+
+class DistanceField:
+    def __init__(self, cells, width, height, limit=None):
+        self.cells = cells
+        self.width = width
+        self.height = height
+        self.limit = limit
+        self.dist = array('l', [UNREACHED]) * (width * height)
+        self.touched = []
+        self.origin = None
+        self.recomputes = 0
+        self.total_time = 0.0
+        self.last_time = 0.0
+        self.max_time = 0.0
+
+    def update(self, x, y):
+        if (x, y) == self.origin:
+            return False
+
+        start = time.perf_counter()
+        dist = self.dist
+        for index in self.touched:
+            dist[index] = UNREACHED
+
+        cells, width, size = self.cells, self.width, self.width * self.height
+        limit = self.limit
+        origin = y * width + x
+        dist[origin] = 0
+        touched = [origin]
+        queue = deque(touched)
+
+        while queue:
+            index = queue.popleft()
+            d = dist[index] + 1
+            if limit is not None and d > limit:
+                continue
+            column = index % width
+            for neighbour in (index + 1 if column + 1 < width else -1,
+                              index - 1 if column > 0 else -1,
+                              index + width if index + width < size else -1,
+                              index - width):
+                if neighbour >= 0 and cells[neighbour] == 0 and dist[neighbour] == UNREACHED:
+                    dist[neighbour] = d
+                    touched.append(neighbour)
+                    queue.append(neighbour)
+
+        self.touched = touched
+        self.origin = (x, y)
+
+        self.last_time = time.perf_counter() - start
+        self.total_time += self.last_time
+        self.max_time = max(self.max_time, self.last_time)
+        self.recomputes += 1
+        return True
+
+    def distance(self, x, y):
+        return self.dist[y * self.width + x]
+
+    def descend(self, x, y):
+        here = self.dist[y * self.width + x]
+        if here <= 0:
+            return None
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height and self.dist[ny * self.width + nx] == here - 1:
+                return dx, dy
+        return None
+
+    def farthest(self):
+        # Клетки добавляются в порядке обхода в ширину, последняя - самая дальняя
+        return self.dist[self.touched[-1]] if self.touched else UNREACHED
+
+    def stats(self):
+        return {
+            'recomputes': self.recomputes,
+            'cells': len(self.touched),
+            'last_ms': self.last_time * 1000,
+            'max_ms': self.max_time * 1000,
+            'mean_ms': self.total_time * 1000 / self.recomputes if self.recomputes else 0.0,
+        }
+
+
+class WindowField(DistanceField):
+    # Поле расстояний по окну большого мира: координаты мира сдвигаются на
+    # левый верхний угол окна, а клетки за его пределами недостижимы
+    def __init__(self, cells, left, top, width, height, limit=None):
+        super().__init__(cells, width, height, limit)
+        self.left = left
+        self.top = top
+
+    def inside(self, x, y):
+        return 0 <= x - self.left < self.width and 0 <= y - self.top < self.height
+
+    def update(self, x, y):
+        return super().update(x - self.left, y - self.top)
+
+    def distance(self, x, y):
+        if not self.inside(x, y):
+            return UNREACHED
+        return super().distance(x - self.left, y - self.top)
+
+    def descend(self, x, y):
+        if not self.inside(x, y):
+            return None
+        return super().descend(x - self.left, y - self.top)
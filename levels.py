@@ -0,0 +1,120 @@
+import multiprocessing
+import random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class LevelFactory:
+    def __init__(self, build, size, workers=2, capacity=8):
+        self.build = build
+        self.size = size
+        self.workers = workers
+        self.capacity = capacity
+        self.executor = None
+        self.broken = False
+        self.pending = OrderedDict()
+        self.ready = OrderedDict()
+        self.unseeded = set()
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        if self.executor is None:
+            # spawn вместо fork: к этому моменту в процессе уже есть потоки
+            # загрузки ресурсов и SDL, а форк таких процессов небезопасен
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self.executor
+
+    def prefetch(self, level, seed=None):
+        self.collect()
+        if seed is None:
+            # Уровень без зерна нужен один на (уровень, размер): повторная
+            # заявка возвращает уже готовый или строящийся
+            for key in self.unseeded:
+                if key[0] == level:
+                    return key
+            key = (level, self.size, random.randrange(2 ** 32))
+        else:
+            key = (level, self.size, seed)
+        if key in self.ready or key in self.pending:
+            return key
+        if self.broken:
+            return None
+        if len(self.ready) + len(self.pending) >= self.capacity:
+            if not self.ready:
+                return None
+            self.discard(next(iter(self.ready)))
+        try:
+            self.pending[key] = self.start().submit(self.build, *key)
+        except (BrokenProcessPool, OSError) as error:
+            # Без пула уровни просто строятся синхронно при запросе
+            print(f'Фоновая генерация уровней недоступна: {error}')
+            self.broken = True
+            return None
+        if seed is None:
+            self.unseeded.add(key)
+        return key
+
+    def discard(self, key):
+        self.ready.pop(key, None)
+        self.pending.pop(key, None)
+        self.unseeded.discard(key)
+
+    def collect(self):
+        for key in [key for key, future in self.pending.items() if future.done()]:
+            future = self.pending.pop(key)
+            if future.exception() is None:
+                self.ready[key] = future.result()
+            else:
+                self.unseeded.discard(key)
+        while len(self.ready) > self.capacity:
+            self.discard(next(iter(self.ready)))
+
+    def find(self, level, seed):
+        if seed is not None:
+            key = (level, self.size, seed)
+            return key if key in self.ready or key in self.pending else None
+        for key in self.unseeded:
+            if key[0] == level:
+                return key
+        for key in list(self.ready) + list(self.pending):
+            if key[0] == level:
+                return key
+        return None
+
+    def take(self, level, seed=None):
+        self.collect()
+        key = self.find(level, seed)
+        snapshot = None
+        if key in self.ready:
+            snapshot = self.ready.pop(key)
+        elif key in self.pending:
+            # Уровень уже строится в фоне: дождаться его не дольше, чем
+            # начинать генерацию заново
+            future = self.pending.pop(key)
+            if future.exception() is None:
+                snapshot = future.result()
+        self.unseeded.discard(key)
+
+        if snapshot is None:
+            self.misses += 1
+            snapshot = self.build(level, self.size, random.randrange(2 ** 32) if seed is None else seed)
+        else:
+            self.hits += 1
+        return snapshot
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.pending.clear()
+        self.unseeded = set(self.ready) & self.unseeded
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'ready': len(self.ready),
+            'pending': len(self.pending),
+        }
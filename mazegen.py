@@ -0,0 +1,333 @@
+import random
+from array import array
+from itertools import permutations
+
+WALL = 1
+PASSAGE = 0
+
+STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+ORDERS = [tuple(STEPS[i] for i in order) for order in permutations(range(4))]
+
+
+def new_grid(width, height):
+    return bytearray([WALL]) * (width * height)
+
+
+def room_size(width, height):
+    return (width + 1) // 2, (height + 1) // 2
+
+
+def dfs(width, height, rng):
+    cells = new_grid(width, height)
+    if width <= 0 or height <= 0:
+        return cells
+
+    pick = rng.randrange
+    orders = ORDERS
+    cells[0] = PASSAGE
+    stack = [(0, 0, iter(orders[pick(24)]))]
+
+    while stack:
+        x, y, order = stack[-1]
+        for dx, dy in order:
+            nx, ny = x + dx * 2, y + dy * 2
+            if 0 <= nx < width and 0 <= ny < height and cells[ny * width + nx] == WALL:
+                cells[(y + dy) * width + x + dx] = PASSAGE
+                cells[ny * width + nx] = PASSAGE
+                stack.append((nx, ny, iter(orders[pick(24)])))
+                break
+        else:
+            stack.pop()
+
+    return cells
+
+
+def kruskal(width, height, rng):
+    cells = new_grid(width, height)
+    rw, rh = room_size(width, height)
+    if rw <= 0 or rh <= 0:
+        return cells
+
+    parent = array('l', range(rw * rh))
+
+    def find(room):
+        while parent[room] != room:
+            parent[room] = parent[parent[room]]
+            room = parent[room]
+        return room
+
+    # Стена кодируется как room * 2 + ориентация (0 - вправо, 1 - вниз)
+    edges = array('l')
+    for ry in range(rh):
+        for rx in range(rw):
+            room = ry * rw + rx
+            if rx + 1 < rw:
+                edges.append(room * 2)
+            if ry + 1 < rh:
+                edges.append(room * 2 + 1)
+    rng.shuffle(edges)
+
+    for room in range(rw * rh):
+        cells[(room // rw) * 2 * width + (room % rw) * 2] = PASSAGE
+
+    for edge in edges:
+        room, down = edge >> 1, edge & 1
+        other = room + rw if down else room + 1
+        a, b = find(room), find(other)
+        if a == b:
+            continue
+        parent[a] = b
+        x, y = (room % rw) * 2, (room // rw) * 2
+        if down:
+            cells[(y + 1) * width + x] = PASSAGE
+        else:
+            cells[y * width + x + 1] = PASSAGE
+
+    return cells
+
+
+def prim(width, height, rng):
+    cells = new_grid(width, height)
+    if width <= 0 or height <= 0:
+        return cells
+
+    pick = rng.randrange
+    queued = bytearray(width * height)
+    frontier = []
+
+    def expand(x, y):
+        for dx, dy in STEPS:
+            nx, ny = x + dx * 2, y + dy * 2
+            if 0 <= nx < width and 0 <= ny < height:
+                index = ny * width + nx
+                if cells[index] == WALL and not queued[index]:
+                    queued[index] = 1
+                    frontier.append((nx, ny))
+
+    cells[0] = PASSAGE
+    expand(0, 0)
+
+    while frontier:
+        i = pick(len(frontier))
+        frontier[i], frontier[-1] = frontier[-1], frontier[i]
+        x, y = frontier.pop()
+
+        links = []
+        for dx, dy in STEPS:
+            nx, ny = x + dx * 2, y + dy * 2
+            if 0 <= nx < width and 0 <= ny < height and cells[ny * width + nx] == PASSAGE:
+                links.append((dx, dy))
+        dx, dy = links[pick(len(links))]
+
+        cells[y * width + x] = PASSAGE
+        cells[(y + dy) * width + x + dx] = PASSAGE
+        expand(x, y)
+
+    return cells
+
+
+def eller(width, height, rng):
+    cells = new_grid(width, height)
+    rw, rh = room_size(width, height)
+    if rw <= 0 or rh <= 0:
+        return cells
+
+    chance = rng.random
+    next_label = 0
+    row = [None] * rw
+
+    for ry in range(rh):
+        y = ry * 2
+        last = ry == rh - 1
+
+        members = {}
+        for rx in range(rw):
+            if row[rx] is None:
+                row[rx] = next_label
+                next_label += 1
+            members.setdefault(row[rx], []).append(rx)
+            cells[y * width + rx * 2] = PASSAGE
+
+        for rx in range(rw - 1):
+            a, b = row[rx], row[rx + 1]
+            if a == b or not (last or chance() < 0.5):
+                continue
+            if len(members[a]) < len(members[b]):
+                a, b = b, a
+            for column in members[b]:
+                row[column] = a
+            members[a].extend(members.pop(b))
+            cells[y * width + rx * 2 + 1] = PASSAGE
+
+        if last:
+            break
+
+        below = [None] * rw
+        for label, columns in members.items():
+            down = [column for column in columns if chance() < 0.5]
+            if not down:
+                down = [columns[int(chance() * len(columns))]]
+            for column in down:
+                below[column] = label
+                cells[(y + 1) * width + column * 2] = PASSAGE
+        row = below
+
+    return cells
+
+
+def wilson(width, height, rng):
+    cells = new_grid(width, height)
+    rw, rh = room_size(width, height)
+    if rw <= 0 or rh <= 0:
+        return cells
+
+    pick = rng.randrange
+    in_tree = bytearray(rw * rh)
+    heading = bytearray(rw * rh)
+    offsets = (1, -1, rw, -rw)
+
+    in_tree[0] = 1
+    cells[0] = PASSAGE
+
+    for start in range(rw * rh):
+        if in_tree[start]:
+            continue
+
+        room = start
+        while not in_tree[room]:
+            x, y = room % rw, room // rw
+            while True:
+                d = pick(4)
+                if d == 0 and x + 1 < rw or d == 1 and x > 0 or d == 2 and y + 1 < rh or d == 3 and y > 0:
+                    break
+            heading[room] = d
+            room += offsets[d]
+
+        room = start
+        while not in_tree[room]:
+            in_tree[room] = 1
+            d = heading[room]
+            dx, dy = STEPS[d]
+            x, y = (room % rw) * 2, (room // rw) * 2
+            cells[y * width + x] = PASSAGE
+            cells[(y + dy) * width + x + dx] = PASSAGE
+            room += offsets[d]
+
+    return cells
+
+
+GENERATORS = {
+    'dfs': dfs,
+    'kruskal': kruskal,
+    'prim': prim,
+    'eller': eller,
+    'wilson': wilson,
+}
+
+
+def generate(width, height, algorithm='dfs', seed=None, rng=None):
+    if algorithm not in GENERATORS:
+        raise ValueError(f'Неизвестный алгоритм генерации: {algorithm}')
+    if rng is None:
+        rng = random.Random(seed)
+    return GENERATORS[algorithm](width, height, rng)
+
+
+def rows(cells, width, height):
+    view = memoryview(cells)
+    return [view[y * width:(y + 1) * width] for y in range(height)]
+
+
+def open_cells(cells):
+    return array('i', [index for index, cell in enumerate(cells) if cell == PASSAGE])
+
+
+class CellSampler:
+    def __init__(self, cells, rng, exclude=(), first=0):
+        self.cells = cells
+        self.first = first
+        self.size = len(cells) - first
+        self.rng = rng
+        self.exclude = set(exclude)
+        self.moved = {}
+
+    def __len__(self):
+        return self.size
+
+    def take(self):
+        # Ленивое тасование Фишера - Йетса: исходный список не копируется,
+        # в словаре хранятся только переставленные позиции, поэтому выбор
+        # без возвращения стоит O(1). Исключённые клетки выпадают из пула
+        # при первом попадании и больше не попадаются
+        cells, first, moved = self.cells, self.first, self.moved
+        while self.size:
+            i = self.rng.randrange(self.size)
+            self.size -= 1
+            cell = moved.get(i, cells[first + i])
+            moved[i] = moved.pop(self.size, cells[first + self.size])
+            if cell not in self.exclude:
+                return cell
+        return None
+
+
+class ChunkedGrid:
+    def __init__(self, chunks_x, chunks_y, algorithm='dfs', seed=None, chunk_size=16):
+        if chunk_size % 2:
+            raise ValueError('Размер чанка должен быть чётным')
+        self.chunks_x = chunks_x
+        self.chunks_y = chunks_y
+        self.chunk_size = chunk_size
+        self.width = chunks_x * chunk_size
+        self.height = chunks_y * chunk_size
+        self.algorithm = algorithm
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.chunks = {}
+        self.generated = 0
+
+    def chunk_rng(self, cx, cy, salt=''):
+        return random.Random(f'{self.seed}:{cx}:{cy}:{salt}')
+
+    def build(self, cx, cy):
+        size = self.chunk_size
+        cells = generate(size, size, self.algorithm, rng=self.chunk_rng(cx, cy))
+
+        # Чанк сам прорубает двери в правую и нижнюю стены, поэтому
+        # соседи получаются связными независимо от порядка генерации
+        if cx + 1 < self.chunks_x:
+            door = self.chunk_rng(cx, cy, 'east').randrange(size // 2) * 2
+            cells[door * size + size - 1] = PASSAGE
+        if cy + 1 < self.chunks_y:
+            door = self.chunk_rng(cx, cy, 'south').randrange(size // 2) * 2
+            cells[(size - 1) * size + door] = PASSAGE
+        return cells
+
+    def load(self, cx, cy):
+        cells = self.chunks.get((cx, cy))
+        if cells is None:
+            cells = self.chunks[(cx, cy)] = self.build(cx, cy)
+            self.generated += 1
+        return cells
+
+    def load_around(self, x, y, radius):
+        cx, cy = x // self.chunk_size, y // self.chunk_size
+        loaded = []
+        for ny in range(max(cy - radius, 0), min(cy + radius + 1, self.chunks_y)):
+            for nx in range(max(cx - radius, 0), min(cx + radius + 1, self.chunks_x)):
+                if (nx, ny) not in self.chunks:
+                    self.load(nx, ny)
+                    loaded.append((nx, ny))
+        return loaded
+
+    def evict_far(self, x, y, radius):
+        cx, cy = x // self.chunk_size, y // self.chunk_size
+        evicted = [key for key in self.chunks if max(abs(key[0] - cx), abs(key[1] - cy)) > radius]
+        for key in evicted:
+            del self.chunks[key]
+        return evicted
+
+    def is_open(self, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        size = self.chunk_size
+        cells = self.chunks.get((x // size, y // size))
+        return cells is not None and cells[(y % size) * size + x % size] == PASSAGE
@@ -0,0 +1,108 @@
+import csv
+import json
+import time
+from collections import deque
+
+
+class FrameProfiler:
+    def __init__(self, window=300):
+        self.window = window
+        self.enabled = False
+        self.samples = {}
+        self.events = None
+        self.origin = 0.0
+        self.frame = 0
+        self.frame_start = 0.0
+        self.last = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.restart()
+        else:
+            self.samples.clear()
+        return self.enabled
+
+    def start_recording(self):
+        self.enabled = True
+        self.events = []
+        self.origin = time.perf_counter()
+        self.restart()
+
+    def restart(self):
+        # Включение приходится на середину кадра, когда start_frame уже
+        # отработал вхолостую: отсчёт идёт от момента включения
+        self.frame_start = self.last = time.perf_counter()
+
+    def stop_recording(self):
+        events, self.events = self.events, None
+        return events or []
+
+    @property
+    def recording(self):
+        return self.events is not None
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last = time.perf_counter()
+        self.frame += 1
+
+    def lap(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.record(name, self.last, now)
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.record('frame', self.frame_start, now)
+        self.last = now
+
+    def record(self, name, start, end):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(end - start)
+        if self.events is not None:
+            self.events.append((self.frame, name, start, end))
+
+    def percentiles(self, name, points=(50, 95, 99)):
+        ordered = sorted(self.samples.get(name, ()))
+        if not ordered:
+            return tuple(0.0 for _ in points)
+        last = len(ordered) - 1
+        return tuple(ordered[min(last, int(last * point / 100 + 0.5))] for point in points)
+
+    def summary(self):
+        return {name: self.percentiles(name) for name in self.samples}
+
+    def export(self, path, events):
+        if path.endswith('.csv'):
+            self.export_csv(path, events)
+        else:
+            self.export_chrome(path, events)
+
+    def export_chrome(self, path, events):
+        trace = [{
+            'name': name,
+            'cat': 'frame',
+            'ph': 'X',
+            'ts': (start - self.origin) * 1e6,
+            'dur': (end - start) * 1e6,
+            'pid': 0,
+            'tid': 0,
+            'args': {'frame': frame},
+        } for frame, name, start, end in events]
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, file)
+
+    def export_csv(self, path, events):
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame', 'phase', 'start_ms', 'duration_ms'])
+            for frame, name, start, end in events:
+                writer.writerow([frame, name, f'{(start - self.origin) * 1000:.3f}', f'{(end - start) * 1000:.3f}'])
@@ -2,10 +2,23 @@ import pygame
 import random
 import sys
 import os
+import sqlite3
+import struct
+import time
+from array import array
+from collections import OrderedDict
 from math import sqrt
 
-pygame.init()
-pygame.mixer.init()
+import distances
+import mazegen
+import swarm
+from assets import AssetManager
+from audio import AudioManager
+from levels import LevelFactory
+from profiler import FrameProfiler
+from questions import QuestionBank, QuestionSession
+import replay
+import savegame
 
 WIDTH, HEIGHT = 800, 600
 CELL_SIZE = 40
@@ -13,6 +26,10 @@ PLAYER_SIZE = 30
 ARTIFACT_SIZE = 20
 ENEMY_SIZE = PLAYER_SIZE
 ATTACK_RADIUS = 50
+ATTACK_CELLS = [(dx, dy)
+                for dy in range(-(ATTACK_RADIUS // CELL_SIZE), ATTACK_RADIUS // CELL_SIZE + 1)
+                for dx in range(-(ATTACK_RADIUS // CELL_SIZE), ATTACK_RADIUS // CELL_SIZE + 1)
+                if sqrt(dx ** 2 + dy ** 2) <= ATTACK_RADIUS / CELL_SIZE]
 MAIN_COLOR = (198, 255, 202)
 CONTRAST_COLOR = (51, 113, 41)
 RED = (255, 0, 0)
@@ -25,41 +42,108 @@ LIGHT_BLUE = (173, 216, 230)
 PURPLE = (128, 0, 128)
 YELLOW = (255, 255, 0)
 COLORS_SET = [(45, 252, 101), (151, 252, 43), (215, 247, 9), (248, 141, 41), (253, 0, 0)]
+HUNT_RANGE = 10
+CHUNK_SIZE = 16
+LOAD_RADIUS = 2
+ARTIFACT_RANGE = 48
+WORLD_CHUNKS = None
+HUNTER_LEVELS = (5,)
+SPAWN_DISTANCE = 5
+PROFILE_PATH = 'frame-profile.json'
+QUESTION_BANK = os.path.join('Sources', 'questions.db')
+RECORD_DIR = None
+SAVE_PATH = 'savegame.pws'
+ADAPTIVE_PACING = True
+TICK_RATE = 60
+IDLE_TIMEOUT = 1.0
+SOUND_PRIORITIES = {
+    'click': 1,
+    'attack': 2,
+    'win': 3,
+    'game_over': 3
+}
+ENEMY_SPEEDS = {
+    1: 25,
+    2: 20,
+    3: 15,
+    4: 10,
+    5: 5
+}
+
+screen = None
+font_large = font_medium = font_small = None
+
+assets = AssetManager(os.path.join('Sources', '.cache'))
+assets.add_sound('click', os.path.join('Sources/Audio', 'click.mp3'), 0.7)
+assets.add_sound('attack', os.path.join('Sources/Audio', 'attack.mp3'))
+assets.add_sound('win', os.path.join('Sources/Audio', 'win.ogg'))
+assets.add_sound('game_over', os.path.join('Sources/Audio', 'gameOver.mp3'))
+assets.add_image('enemy', os.path.join('Sources/Pictures', 'js.jpg'), (ENEMY_SIZE, ENEMY_SIZE))
+assets.add_image('player', os.path.join('Sources/Pictures', 'pt.png'), (PLAYER_SIZE, PLAYER_SIZE))
+assets.add_image('artifact', os.path.join('Sources/Pictures', 'art.png'), (ARTIFACT_SIZE, ARTIFACT_SIZE))
+audio = AudioManager(assets)
+profiler = FrameProfiler()
+
+
+def play_sound(name):
+    return audio.play(name, SOUND_PRIORITIES.get(name, 0))
+
+
+SPRITE_OFFSETS = {
+    'player': (CELL_SIZE - PLAYER_SIZE) // 2,
+    'enemy': (CELL_SIZE - ENEMY_SIZE) // 2,
+    'artifact': (CELL_SIZE - ARTIFACT_SIZE) // 2,
+}
+fallback_sprites = {}
+
+
+def render_fallback(name):
+    if name == 'artifact':
+        surface = pygame.Surface((ARTIFACT_SIZE, ARTIFACT_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(surface, GREEN, (ARTIFACT_SIZE // 2, ARTIFACT_SIZE // 2), ARTIFACT_SIZE // 2)
+        return surface.convert_alpha()
+    size = PLAYER_SIZE if name == 'player' else ENEMY_SIZE
+    surface = pygame.Surface((size, size))
+    surface.fill(RED if name == 'player' else PURPLE)
+    return surface.convert()
+
+
+def attack_sprite():
+    surface = fallback_sprites.get('attack')
+    if surface is None:
+        surface = pygame.Surface((ATTACK_RADIUS * 2, ATTACK_RADIUS * 2), pygame.SRCALPHA)
+        pygame.draw.circle(surface, (255, 255, 0, 100), (ATTACK_RADIUS, ATTACK_RADIUS), ATTACK_RADIUS)
+        surface = fallback_sprites['attack'] = surface.convert_alpha()
+    return surface
+
+
+def sprite(name):
+    # Картинка актёра, а если она не загрузилась - заранее нарисованная
+    # замена, чтобы каждый слой рисовался одним вызовом screen.blits
+    image = assets.image(name)
+    if image:
+        return image
+    surface = fallback_sprites.get(name)
+    if surface is None:
+        surface = fallback_sprites[name] = render_fallback(name)
+    return surface
+
+
+def init_display():
+    global screen, font_large, font_medium, font_small
+    if screen is not None:
+        return screen
+
+    pygame.init()
+    pygame.mixer.init()
+    audio.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('Лабиринт с загадочными артефактами')
+    font_large = pygame.font.SysFont('Arial', 48)
+    font_medium = pygame.font.SysFont('Arial', 36)
+    font_small = pygame.font.SysFont('Arial', 24)
+    return screen
 
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Лабиринт с загадочными артефактами')
-font_large = pygame.font.SysFont('Arial', 48)
-font_medium = pygame.font.SysFont('Arial', 36)
-font_small = pygame.font.SysFont('Arial', 24)
-
-try:
-    click_sound = pygame.mixer.Sound(os.path.join('Sources/Audio', 'click.mp3'))
-    attack_sound = pygame.mixer.Sound(os.path.join('Sources/Audio', 'attack.mp3'))
-    win_sound = pygame.mixer.Sound(os.path.join('Sources/Audio', 'win.ogg'))
-    game_over_sound = pygame.mixer.Sound(os.path.join('Sources/Audio', 'gameOver.mp3'))
-    theme_music = pygame.mixer.Sound(os.path.join('Sources/Audio', 'theme.mp3'))
-    theme_music.set_volume(0.5)
-    click_sound.set_volume(0.7)
-except:
-    print('Ошибка загрузки звуков')
-    class DummySound:
-        def play(self): pass
-
-
-    click_sound = attack_sound = win_sound = game_over_sound = theme_music = DummySound()
-
-try:
-    enemy_image = pygame.image.load(os.path.join('Sources/Pictures', 'js.jpg'))
-    enemy_image = pygame.transform.scale(enemy_image, (ENEMY_SIZE, ENEMY_SIZE))
-    player_image = pygame.image.load(os.path.join('Sources/Pictures', 'pt.png'))
-    player_image = pygame.transform.scale(player_image, (PLAYER_SIZE, PLAYER_SIZE))
-    artifact_image = pygame.image.load(os.path.join('Sources/Pictures', 'art.png'))
-    artifact_image = pygame.transform.scale(artifact_image, (ARTIFACT_SIZE, ARTIFACT_SIZE))
-except:
-    print('Ошибка загрузки изображений')
-    enemy_image = None
-    player_image = None
-    artifact_image = None
 
 quiz_questions = {
     'Какая функция находит длину строки?': ['len', 'input', 'print', 'length'],
@@ -78,6 +162,53 @@ quiz_questions = {
     'Какой оператор используется для логического И?': ['and', '&', '&&', '|']
 }
 
+question_bank = QuestionBank(QUESTION_BANK)
+
+
+def open_question_bank():
+    try:
+        empty = len(question_bank) == 0
+    except sqlite3.Error as error:
+        print(f'Ошибка открытия банка вопросов {question_bank.path}: {error}')
+        question_bank.path = ':memory:'
+        question_bank.connection = None
+        empty = True
+    if empty:
+        # Встроенные вопросы - начальное содержимое банка
+        question_bank.add((question, answers, 1, 'python') for question, answers in quiz_questions.items())
+    return question_bank
+
+
+class TextCache:
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias, color):
+        key = (font, text, antialias, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+text_cache = TextCache()
+
 
 class Button:
     def __init__(self, x, y, width, height, text, color, hover_color):
@@ -86,15 +217,27 @@ class Button:
         self.color = color
         self.hover_color = hover_color
         self.is_hovered = False
+        self.surfaces = None
 
-    def draw(self, surface):
-        color = self.hover_color if self.is_hovered else self.color
-        pygame.draw.rect(surface, color, self.rect, border_radius=10)
-        pygame.draw.rect(surface, CONTRAST_COLOR, self.rect, 2, border_radius=10)
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.surfaces = None
+
+    def render(self, color):
+        surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        area = surface.get_rect()
+        pygame.draw.rect(surface, color, area, border_radius=10)
+        pygame.draw.rect(surface, CONTRAST_COLOR, area, 2, border_radius=10)
 
-        text_surf = font_small.render(self.text, True, CONTRAST_COLOR)
-        text_rect = text_surf.get_rect(center=self.rect.center)
-        surface.blit(text_surf, text_rect)
+        text_surf = text_cache.render(font_small, self.text, True, CONTRAST_COLOR)
+        surface.blit(text_surf, text_surf.get_rect(center=area.center))
+        return surface.convert_alpha()
+
+    def draw(self, surface):
+        if self.surfaces is None:
+            self.surfaces = (self.render(self.color), self.render(self.hover_color))
+        return surface.blit(self.surfaces[self.is_hovered], self.rect)
 
     def check_hover(self, pos):
         self.is_hovered = self.rect.collidepoint(pos)
@@ -102,33 +245,27 @@ class Button:
 
     def is_clicked(self, pos, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            click_sound.play()
+            play_sound('click')
             return self.rect.collidepoint(pos)
         return False
 
 
 class Enemy:
-    def __init__(self, x, y, maze, level):
+    def __init__(self, x, y, maze, level, hunting=False):
         self.x = x
         self.y = y
         self.maze = maze
         self.level = level
-        self.direction = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        self.hunting = hunting
+        self.direction = maze.rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
         self.move_counter = 0
-        self.path_length = random.randint(1, 3)
+        self.path_length = maze.rng.randint(1, 3)
         self.is_alive = True
         self.speed_counter = 0
         self.speed = self.calculate_speed()
 
     def calculate_speed(self):
-        speed_levels = {
-            1: 25,
-            2: 20,
-            3: 15,
-            4: 10,
-            5: 5
-        }
-        return speed_levels.get(self.level, 15)
+        return ENEMY_SPEEDS.get(self.level, 15)
 
     def move(self):
         if not self.is_alive:
@@ -140,25 +277,27 @@ class Enemy:
 
         self.speed_counter = 0
 
+        if self.hunting:
+            step = self.maze.hunt_field.descend(self.x, self.y)
+            if step:
+                self.direction = step
+                self.move_counter = 0
+                self.step_to(self.x + step[0], self.y + step[1])
+                return
+
         new_x = self.x + self.direction[0]
         new_y = self.y + self.direction[1]
 
-        if (self.move_counter >= self.path_length or
-                new_x < 0 or new_x >= self.maze.width or
-                new_y < 0 or new_y >= self.maze.height or
-                self.maze.grid[new_y][new_x] == 1):
+        if self.move_counter >= self.path_length or not self.maze.is_open(new_x, new_y):
 
             possible_directions = []
             for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-                nx, ny = self.x + dx, self.y + dy
-                if (0 <= nx < self.maze.width and
-                        0 <= ny < self.maze.height and
-                        self.maze.grid[ny][nx] == 0):
+                if self.maze.is_open(self.x + dx, self.y + dy):
                     possible_directions.append((dx, dy))
 
             if possible_directions:
-                self.direction = random.choice(possible_directions)
-                self.path_length = random.randint(1, 3)
+                self.direction = self.maze.rng.choice(possible_directions)
+                self.path_length = self.maze.rng.randint(1, 3)
                 self.move_counter = 0
             else:
                 return
@@ -166,24 +305,22 @@ class Enemy:
         new_x = self.x + self.direction[0]
         new_y = self.y + self.direction[1]
 
-        if (0 <= new_x < self.maze.width and
-                0 <= new_y < self.maze.height and
-                self.maze.grid[new_y][new_x] == 0):
-            self.x = new_x
-            self.y = new_y
+        if self.maze.is_open(new_x, new_y):
             self.move_counter += 1
+            self.step_to(new_x, new_y)
 
-    def draw(self):
+    def step_to(self, x, y):
+        old_x, old_y = self.x, self.y
+        self.x = x
+        self.y = y
+        self.maze.move_enemy(self, old_x, old_y)
+
+    def draw(self, camera=(0, 0)):
         if self.is_alive:
-            if enemy_image:
-                screen.blit(enemy_image,
-                            (self.x * CELL_SIZE + (CELL_SIZE - ENEMY_SIZE) // 2,
-                             self.y * CELL_SIZE + (CELL_SIZE - ENEMY_SIZE) // 2))
-            else:
-                pygame.draw.rect(screen, PURPLE,
-                                 (self.x * CELL_SIZE + (CELL_SIZE - ENEMY_SIZE) // 2,
-                                  self.y * CELL_SIZE + (CELL_SIZE - ENEMY_SIZE) // 2,
-                                  ENEMY_SIZE, ENEMY_SIZE))
+            offset = SPRITE_OFFSETS['enemy']
+            return screen.blit(sprite('enemy'), (self.x * CELL_SIZE + offset - camera[0],
+                                                 self.y * CELL_SIZE + offset - camera[1]))
+        return None
 
     def check_collision(self, player_x, player_y):
         if not self.is_alive:
@@ -197,41 +334,25 @@ class Player:
         self.x = 0
         self.y = 0
         self.artifacts_collected = 0
-        self.find_valid_start()
+        self.x, self.y = maze.find_start()
         self.attack_cooldown = 0
 
-    def find_valid_start(self):
-        for y in range(self.maze.height):
-            for x in range(self.maze.width):
-                if self.maze.grid[y][x] == 0:
-                    valid_position = True
-                    for enemy in self.maze.enemies:
-                        if enemy.x == x and enemy.y == y:
-                            valid_position = False
-                            break
-                    if valid_position:
-                        self.x = x
-                        self.y = y
-                        return
-
     def move(self, dx, dy):
         new_x = self.x + dx
         new_y = self.y + dy
 
-        if 0 <= new_x < self.maze.width and 0 <= new_y < self.maze.height:
-            if self.maze.grid[new_y][new_x] == 0:
-                self.x = new_x
-                self.y = new_y
+        if self.maze.is_open(new_x, new_y):
+            self.x = new_x
+            self.y = new_y
 
     def attack(self):
         if self.attack_cooldown <= 0:
             self.attack_cooldown = 20
-            attack_sound.play()
-            for enemy in self.maze.enemies:
-                if enemy.is_alive:
-                    distance = sqrt((enemy.x - self.x) ** 2 + (enemy.y - self.y) ** 2)
-                    if distance <= ATTACK_RADIUS / CELL_SIZE:
-                        enemy.is_alive = False
+            play_sound('attack')
+            for enemy in self.maze.enemies_near(self.x, self.y):
+                self.maze.remove_enemy(enemy)
+            if self.maze.swarm is not None:
+                self.maze.swarm.kill_within(self.x, self.y, ATTACK_RADIUS / CELL_SIZE)
             return True
         return False
 
@@ -239,317 +360,1057 @@ class Player:
         if self.attack_cooldown > 0:
             self.attack_cooldown -= 1
 
-    def draw(self):
-        if player_image:
-            screen.blit(player_image,
-                        (self.x * CELL_SIZE + (CELL_SIZE - PLAYER_SIZE) // 2,
-                         self.y * CELL_SIZE + (CELL_SIZE - PLAYER_SIZE) // 2))
-        else:
-            pygame.draw.rect(screen, RED,
-                             (self.x * CELL_SIZE + (CELL_SIZE - PLAYER_SIZE) // 2,
-                              self.y * CELL_SIZE + (CELL_SIZE - PLAYER_SIZE) // 2,
-                              PLAYER_SIZE, PLAYER_SIZE))
+    def draw(self, camera=(0, 0)):
+        left, top = self.x * CELL_SIZE - camera[0], self.y * CELL_SIZE - camera[1]
+        offset = SPRITE_OFFSETS['player']
+        layer = [(sprite('player'), (left + offset, top + offset))]
 
         if self.attack_cooldown > 15:
-            attack_surface = pygame.Surface((ATTACK_RADIUS * 2, ATTACK_RADIUS * 2), pygame.SRCALPHA)
-            pygame.draw.circle(attack_surface, (255, 255, 0, 100), (ATTACK_RADIUS, ATTACK_RADIUS), ATTACK_RADIUS)
-            screen.blit(attack_surface, (self.x * CELL_SIZE + CELL_SIZE // 2 - ATTACK_RADIUS,
-                                         self.y * CELL_SIZE + CELL_SIZE // 2 - ATTACK_RADIUS))
+            layer.append((attack_sprite(), (left + CELL_SIZE // 2 - ATTACK_RADIUS,
+                                            top + CELL_SIZE // 2 - ATTACK_RADIUS)))
+        return screen.blits(layer)
 
 
 class Maze:
-    def __init__(self, width, height, level=1):
+    def __init__(self, width, height, level=1, generator='dfs', seed=None, hunters=False):
         self.width = width // CELL_SIZE
         self.height = height // CELL_SIZE
         self.level = level
-        self.grid = [[1 for _ in range(self.width)] for _ in range(self.height)]
-        self.generate_maze(0, 0)
+        self.generator = generator
+        self.hunters = hunters
+        self.rng = random.Random(seed)
+        self.landmarks = {}
+        self.generate_maze()
+        self.hunt_field = distances.DistanceField(self.cells, self.width, self.height, HUNT_RANGE) if hunters else None
         self.place_artifacts()
         self.enemies = []
+        self.occupants = {}
+        self.moves = 0
         self.place_enemies(level)
+        self.swarm = None
+        self.static_layer = None
+        self.camera = (0, 0)
+
+    def generate_maze(self):
+        self.cells = mazegen.generate(self.width, self.height, self.generator, rng=self.rng)
+        self.grid = mazegen.rows(self.cells, self.width, self.height)
+        self.landmarks.clear()
+
+        # Индексы открытых клеток и клеток, достижимых от старта (в порядке
+        # обхода в ширину, то есть по возрастанию расстояния от старта)
+        self.open_cells = mazegen.open_cells(self.cells)
+        first = self.open_cells[0] if self.open_cells else 0
+        self.start = (first % self.width, first // self.width)
+        self.reachable = array('i', self.distances_from(*self.start).touched if self.open_cells else ())
+
+    def snapshot(self):
+        return {
+            'size': (self.width, self.height),
+            'level': self.level,
+            'generator': self.generator,
+            'cells': bytes(self.cells),
+            'open_cells': self.open_cells,
+            'reachable': self.reachable,
+            'artifacts': list(self.artifacts),
+            'enemies': [(enemy.x, enemy.y, enemy.direction, enemy.path_length, enemy.move_counter,
+                         enemy.speed_counter, enemy.is_alive) for enemy in self.enemies],
+            'rng': self.rng.getstate(),
+        }
 
-    def generate_maze(self, x, y):
-        directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-        random.shuffle(directions)
-
-        self.grid[y][x] = 0
-
-        for dx, dy in directions:
-            nx, ny = x + dx * 2, y + dy * 2
-            if 0 <= nx < self.width and 0 <= ny < self.height and self.grid[ny][nx] == 1:
-                self.grid[y + dy][x + dx] = 0
-                self.generate_maze(nx, ny)
+    @classmethod
+    def from_snapshot(cls, snapshot, hunters=False):
+        maze = cls.__new__(cls)
+        maze.width, maze.height = snapshot['size']
+        maze.level = snapshot['level']
+        maze.generator = snapshot['generator']
+        maze.hunters = hunters
+        maze.rng = random.Random()
+        maze.landmarks = {}
+        maze.cells = bytearray(snapshot['cells'])
+        maze.grid = mazegen.rows(maze.cells, maze.width, maze.height)
+        maze.open_cells = snapshot['open_cells']
+        maze.reachable = snapshot['reachable']
+        first = maze.reachable[0] if maze.reachable else 0
+        maze.start = (first % maze.width, first // maze.width)
+        maze.hunt_field = distances.DistanceField(maze.cells, maze.width, maze.height, HUNT_RANGE) if hunters else None
+        maze.artifacts = list(snapshot['artifacts'])
+        maze.artifact_cells = set(maze.artifacts)
+        maze.enemies = []
+        maze.occupants = {}
+        maze.moves = 0
+        for x, y, direction, path_length, move_counter, speed_counter, is_alive in snapshot['enemies']:
+            enemy = Enemy(x, y, maze, maze.level, hunters)
+            enemy.direction = direction
+            enemy.path_length = path_length
+            enemy.move_counter = move_counter
+            enemy.speed_counter = speed_counter
+            if is_alive:
+                maze.add_enemy(enemy)
+            else:
+                # Убитые враги остаются в списке, чтобы номера врагов не сдвигались
+                enemy.is_alive = False
+                maze.enemies.append(enemy)
+        maze.rng.setstate(snapshot['rng'])
+        maze.swarm = None
+        maze.static_layer = None
+        maze.camera = (0, 0)
+        return maze
+
+    def is_open(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.grid[y][x] == 0
+
+    def find_start(self):
+        x, y = self.start
+        if not self.enemy_at(x, y):
+            return x, y
+        for index in self.reachable:
+            x, y = index % self.width, index // self.width
+            if not self.enemy_at(x, y):
+                return x, y
+        return self.start
 
     def place_artifacts(self):
         self.artifacts = []
+        self.artifact_cells = set()
+        start = self.start[1] * self.width + self.start[0]
+        spots = mazegen.CellSampler(self.reachable, self.rng, exclude=(start,))
         while len(self.artifacts) < 3:
-            x = random.randint(0, self.width - 1)
-            y = random.randint(0, self.height - 1)
-            if self.grid[y][x] == 0 and (x, y) not in self.artifacts:
-                self.artifacts.append((x, y))
+            index = spots.take()
+            if index is None:
+                break
+            self.artifacts.append((index % self.width, index // self.width))
+            self.artifact_cells.add(self.artifacts[-1])
+
+    def take_artifact(self, x, y):
+        if (x, y) not in self.artifact_cells:
+            return False
+        self.artifact_cells.remove((x, y))
+        self.artifacts.remove((x, y))
+        return True
+
+    def distances_from(self, x, y):
+        field = self.landmarks.get((x, y))
+        if field is None:
+            field = distances.DistanceField(self.cells, self.width, self.height)
+            field.update(x, y)
+            self.landmarks[(x, y)] = field
+        return field
 
     def place_enemies(self, count):
+        if not self.reachable:
+            return
+        start = self.distances_from(*self.start)
+        safe = min(SPAWN_DISTANCE, start.farthest())
+
+        # Клетки в self.reachable упорядочены по расстоянию от старта,
+        # поэтому все достаточно далёкие клетки образуют хвост списка
+        first = 0
+        while start.dist[self.reachable[first]] < safe:
+            first += 1
+        spots = mazegen.CellSampler(self.reachable, self.rng,
+                                    exclude=[y * self.width + x for x, y in self.artifact_cells], first=first)
         for _ in range(count):
-            while True:
-                x = random.randint(0, self.width - 1)
-                y = random.randint(0, self.height - 1)
-                if self.grid[y][x] == 0:
-                    valid_position = True
-                    for artifact in self.artifacts:
-                        if (x, y) == artifact:
-                            valid_position = False
-                            break
-                    if valid_position:
-                        self.enemies.append(Enemy(x, y, self, self.level))
-                        break
+            index = spots.take()
+            if index is None:
+                break
+            self.add_enemy(Enemy(index % self.width, index // self.width, self, self.level, self.hunters))
 
-    def draw(self):
+    def track_player(self, x, y):
+        if self.hunt_field is not None:
+            self.hunt_field.update(x, y)
+
+    def follow(self, x, y):
+        return False
+
+    def add_enemy(self, enemy):
+        self.enemies.append(enemy)
+        self.occupants.setdefault((enemy.x, enemy.y), []).append(enemy)
+
+    def move_enemy(self, enemy, old_x, old_y):
+        bucket = self.occupants[(old_x, old_y)]
+        bucket.remove(enemy)
+        if not bucket:
+            del self.occupants[(old_x, old_y)]
+        self.occupants.setdefault((enemy.x, enemy.y), []).append(enemy)
+        self.moves += 1
+
+    def remove_enemy(self, enemy):
+        enemy.is_alive = False
+        self.moves += 1
+        bucket = self.occupants[(enemy.x, enemy.y)]
+        bucket.remove(enemy)
+        if not bucket:
+            del self.occupants[(enemy.x, enemy.y)]
+
+    def enemy_at(self, x, y):
+        if (x, y) in self.occupants:
+            return True
+        return self.swarm is not None and self.swarm.check_collision(x, y)
+
+    def enemies_near(self, x, y):
+        return [enemy for dx, dy in ATTACK_CELLS for enemy in self.occupants.get((x + dx, y + dy), ())]
+
+    def spawn_swarm(self, count, seed=None):
+        taken = [y * self.width + x for x, y in self.artifacts]
+        taken += [enemy.y * self.width + enemy.x for enemy in self.enemies]
+        free = mazegen.CellSampler(self.open_cells, self.rng, exclude=taken)
+        spots = []
+        while len(spots) < count:
+            index = free.take()
+            if index is None:
+                break
+            spots.append((index % self.width, index // self.width))
+        self.swarm = swarm.EnemySwarm(self.cells, self.width, self.height,
+                                      [x for x, y in spots], [y for x, y in spots],
+                                      ENEMY_SPEEDS.get(self.level, 15), seed)
+        return self.swarm
+
+    def draw_walls(self, surface):
         for y in range(self.height):
             for x in range(self.width):
                 if self.grid[y][x] == 1:
-                    pygame.draw.rect(screen, CONTRAST_COLOR, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+                    pygame.draw.rect(surface, CONTRAST_COLOR, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
                 else:
-                    pygame.draw.rect(screen, MAIN_COLOR, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
-
-        for artifact in self.artifacts:
-            x, y = artifact
-            if artifact_image:
-                screen.blit(artifact_image,
-                            (x * CELL_SIZE + (CELL_SIZE - ARTIFACT_SIZE) // 2,
-                             y * CELL_SIZE + (CELL_SIZE - ARTIFACT_SIZE) // 2))
-            else:
-                pygame.draw.circle(screen, GREEN,
-                               (x * CELL_SIZE + CELL_SIZE // 2, y * CELL_SIZE + CELL_SIZE // 2),
-                               ARTIFACT_SIZE // 2)
+                    pygame.draw.rect(surface, MAIN_COLOR, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
+
+    def render_static(self):
+        if self.static_layer is None:
+            layer = pygame.Surface(screen.get_size()).convert()
+            layer.fill(MAIN_COLOR)
+            self.draw_walls(layer)
+            self.static_layer = layer
+        return self.static_layer
+
+    def visible_cells(self):
+        view_width, view_height = screen.get_size()
+        cam_x, cam_y = self.camera
+        return (cam_x // CELL_SIZE, cam_y // CELL_SIZE,
+                (cam_x + view_width - 1) // CELL_SIZE + 1, (cam_y + view_height - 1) // CELL_SIZE + 1)
+
+    def draw_actors(self):
+        cam_x, cam_y = self.camera
+        left, top, right, bottom = self.visible_cells()
+
+        # Каждый слой (артефакты, враги) рисуется одним вызовом screen.blits
+        image = sprite('artifact')
+        offset = SPRITE_OFFSETS['artifact']
+        rects = screen.blits([(image, (x * CELL_SIZE + offset - cam_x, y * CELL_SIZE + offset - cam_y))
+                              for x, y in self.artifacts
+                              if left <= x < right and top <= y < bottom])
+
+        # Живые враги лежат в self.occupants по клеткам: несколько врагов
+        # в одной клетке рисуются одним прямоугольником
+        image = sprite('enemy')
+        offset = SPRITE_OFFSETS['enemy']
+        layer = [(image, (x * CELL_SIZE + offset - cam_x, y * CELL_SIZE + offset - cam_y))
+                 for x, y in self.occupants
+                 if left <= x < right and top <= y < bottom]
+        if self.swarm is not None:
+            layer += [(image, (x * CELL_SIZE + offset - cam_x, y * CELL_SIZE + offset - cam_y))
+                      for x, y in self.swarm.alive_positions()
+                      if left <= x < right and top <= y < bottom]
+        rects += screen.blits(layer)
+        return rects
 
-        for enemy in self.enemies:
-            enemy.draw()
+    def draw(self):
+        screen.blit(self.render_static(), (0, 0))
+        return self.draw_actors()
+
+
+class World(Maze):
+    def __init__(self, chunks_x, chunks_y, level=1, generator='dfs', seed=None, hunters=False):
+        if hunters:
+            raise ValueError('Охотники не поддерживаются в мире из чанков')
+        super().__init__(chunks_x * CHUNK_SIZE * CELL_SIZE, chunks_y * CHUNK_SIZE * CELL_SIZE,
+                         level, generator, seed)
+
+    def generate_maze(self):
+        self.chunks = mazegen.ChunkedGrid(self.width // CHUNK_SIZE, self.height // CHUNK_SIZE,
+                                          self.generator, self.rng.randrange(2 ** 32), CHUNK_SIZE)
+        self.cells = None
+        self.grid = None
+        self.open_cells = []
+        self.reachable = []
+        self.start = (0, 0)
+        self.chunk_surfaces = {}
+        self.center = (0, 0)
+        self.player_cell = (0, 0)
+        # Убитые враги по чанкам (номера появлений) переживают выгрузку
+        # чанка, а живые не появляются второй раз, если ушли в соседний
+        self.killed = {}
+        self.spawned = set()
+        self.chunks.load_around(0, 0, LOAD_RADIUS)
+
+    def is_open(self, x, y):
+        return self.chunks.is_open(x, y)
+
+    def distances_from(self, x, y):
+        # Обход в ширину ограничен окном из чанков в радиусе LOAD_RADIUS
+        # вокруг клетки: дальше окна путь считается недостижимым
+        field = self.landmarks.get((x, y))
+        if field is not None:
+            return field
+
+        size = CHUNK_SIZE
+        cx, cy = x // size, y // size
+        left, top = max(cx - LOAD_RADIUS, 0), max(cy - LOAD_RADIUS, 0)
+        right, bottom = min(cx + LOAD_RADIUS + 1, self.chunks.chunks_x), min(cy + LOAD_RADIUS + 1, self.chunks.chunks_y)
+        width, height = (right - left) * size, (bottom - top) * size
+        cells = bytearray(b'\x01') * (width * height)
+        for ky in range(top, bottom):
+            for kx in range(left, right):
+                chunk = self.chunks.chunks.get((kx, ky)) or self.chunks.build(kx, ky)
+                for row in range(size):
+                    start = ((ky - top) * size + row) * width + (kx - left) * size
+                    cells[start:start + size] = chunk[row * size:(row + 1) * size]
+
+        field = distances.WindowField(cells, left * size, top * size, width, height)
+        field.update(x, y)
+        self.landmarks[(x, y)] = field
+        return field
 
+    def place_artifacts(self):
+        self.artifacts = []
+        self.artifact_cells = set()
+        columns = (min(self.width, ARTIFACT_RANGE) + 1) // 2
+        rows = (min(self.height, ARTIFACT_RANGE) + 1) // 2
+        while len(self.artifacts) < 3:
+            x = self.rng.randint(0, columns - 1) * 2
+            y = self.rng.randint(0, rows - 1) * 2
+            if (x, y) != (0, 0) and (x, y) not in self.artifact_cells:
+                self.artifacts.append((x, y))
+                self.artifact_cells.add((x, y))
 
-def draw_level_select():
-    screen.fill(MAIN_COLOR)
-    title = font_large.render('Выберите уровень сложности', True, CONTRAST_COLOR)
-    screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 100))
+    def place_enemies(self, count):
+        for cx, cy in list(self.chunks.chunks):
+            self.populate(cx, cy)
+
+    def populate(self, cx, cy):
+        rng = self.chunks.chunk_rng(cx, cy, 'enemies')
+        size = CHUNK_SIZE
+        px, py = self.player_cell
+        killed = self.killed.get((cx, cy), ())
+        for i in range(self.level):
+            x = cx * size + rng.randrange(size // 2) * 2
+            y = cy * size + rng.randrange(size // 2) * 2
+            spawn = (cx, cy, i)
+            if (i in killed or spawn in self.spawned or (x, y) in self.artifact_cells or
+                    abs(x - px) + abs(y - py) < SPAWN_DISTANCE):
+                continue
+            enemy = Enemy(x, y, self, self.level)
+            enemy.spawn = spawn
+            self.spawned.add(spawn)
+            self.add_enemy(enemy)
+
+    def remove_enemy(self, enemy):
+        super().remove_enemy(enemy)
+        self.spawned.discard(enemy.spawn)
+        self.killed.setdefault(enemy.spawn[:2], set()).add(enemy.spawn[2])
+
+    def track_player(self, x, y):
+        self.player_cell = (x, y)
+        center = (x // CHUNK_SIZE, y // CHUNK_SIZE)
+        if center == self.center:
+            return
+        self.center = center
+
+        for cx, cy in self.chunks.load_around(x, y, LOAD_RADIUS):
+            self.populate(cx, cy)
+
+        evicted = set(self.chunks.evict_far(x, y, LOAD_RADIUS + 1))
+        if evicted:
+            kept = []
+            for enemy in self.enemies:
+                if (enemy.x // CHUNK_SIZE, enemy.y // CHUNK_SIZE) not in evicted:
+                    kept.append(enemy)
+                elif enemy.is_alive:
+                    # Выгрузка - не смерть: враг вернётся вместе со своим чанком
+                    Maze.remove_enemy(self, enemy)
+                    self.spawned.discard(enemy.spawn)
+            self.enemies = kept
+
+    def follow(self, x, y):
+        view_width, view_height = screen.get_size()
+        camera = (max(min(x * CELL_SIZE + CELL_SIZE // 2 - view_width // 2, self.width * CELL_SIZE - view_width), 0),
+                  max(min(y * CELL_SIZE + CELL_SIZE // 2 - view_height // 2, self.height * CELL_SIZE - view_height), 0))
+        if camera == self.camera:
+            return False
+        self.camera = camera
+        self.static_layer = None
+        return True
+
+    def chunk_surface(self, cx, cy):
+        surface = self.chunk_surfaces.get((cx, cy))
+        if surface is None:
+            size = CHUNK_SIZE
+            cells = self.chunks.load(cx, cy)
+            surface = pygame.Surface((size * CELL_SIZE, size * CELL_SIZE)).convert()
+            surface.fill(MAIN_COLOR)
+            for y in range(size):
+                for x in range(size):
+                    if cells[y * size + x] == 1:
+                        pygame.draw.rect(surface, CONTRAST_COLOR, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+                    else:
+                        pygame.draw.rect(surface, MAIN_COLOR, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
+            self.chunk_surfaces[(cx, cy)] = surface
+        return surface
+
+    def render_static(self):
+        if self.static_layer is None:
+            layer = pygame.Surface(screen.get_size()).convert()
+            layer.fill(MAIN_COLOR)
+            left, top, right, bottom = self.visible_cells()
+            visible = [(cx, cy)
+                       for cy in range(top // CHUNK_SIZE, min((bottom - 1) // CHUNK_SIZE + 1, self.chunks.chunks_y))
+                       for cx in range(left // CHUNK_SIZE, min((right - 1) // CHUNK_SIZE + 1, self.chunks.chunks_x))]
+            for cx, cy in visible:
+                layer.blit(self.chunk_surface(cx, cy), (cx * CHUNK_SIZE * CELL_SIZE - self.camera[0],
+                                                        cy * CHUNK_SIZE * CELL_SIZE - self.camera[1]))
+            self.chunk_surfaces = {key: self.chunk_surfaces[key] for key in visible}
+            self.static_layer = layer
+        return self.static_layer
+
+
+class DirtyRenderer:
+    def __init__(self, surface):
+        self.surface = surface
+        self.background = None
+        self.dirty = []
+        self.full = True
+        self.covered = False
+
+    def set_background(self, background):
+        self.background = background
+        self.full = True
+
+    def invalidate(self):
+        self.full = True
+
+    def begin(self, overlay=False):
+        if overlay or self.covered:
+            self.full = True
+        self.covered = overlay
+
+        if self.full:
+            self.surface.blit(self.background, (0, 0))
+        else:
+            for rect in self.dirty:
+                self.surface.blit(self.background, rect, rect)
 
-    buttons = []
-    for i in range(5):
-        btn = Button(WIDTH // 2 - 100, 200 + i * 70, 200, 50, f'Уровень {i + 1}',
-                     COLORS_SET[i],
-                     YELLOW)
-        buttons.append(btn)
+    def present(self, rects):
+        if self.full:
+            pygame.display.flip()
+            self.full = False
+        else:
+            pygame.display.update(self.dirty + rects)
+        self.dirty = rects
+
+
+def draw_hud(player, level):
+    text = text_cache.render(font_small, f'Артефакты: {player.artifacts_collected}/3', True, BLUE)
+    level_text = text_cache.render(font_small, f'Уровень: {level}', True, BLUE)
+    attack_hint = text_cache.render(font_small, 'Пробел - атака', True, BLUE)
+
+    return [screen.blit(text, (10, 10)),
+            screen.blit(level_text, (WIDTH - level_text.get_width() - 10, HEIGHT - 30)),
+            screen.blit(attack_hint, (WIDTH - attack_hint.get_width() - 10, 10))]
+
+
+class ProfilerOverlay:
+    def __init__(self, profiler, refresh=30):
+        self.profiler = profiler
+        self.refresh = refresh
+        self.surface = None
+        self.frames = 0
+
+    def build(self):
+        summary = self.profiler.summary()
+        lines = [f'{"фаза":<14}{"p50":>7}{"p95":>7}{"p99":>7}']
+        for name, points in summary.items():
+            lines.append(f'{name:<14}' + ''.join(f'{point * 1000:>7.2f}' for point in points))
+        if self.profiler.recording:
+            lines.append(f'запись -> {PROFILE_PATH}')
+
+        line_height = font_small.get_linesize()
+        texts = [font_small.render(line, True, YELLOW) for line in lines]
+        surface = pygame.Surface((max(text.get_width() for text in texts) + 20, line_height * len(texts) + 20),
+                                 pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 200))
+        for i, text in enumerate(texts):
+            surface.blit(text, (10, 10 + i * line_height))
+        return surface.convert_alpha()
 
-    return buttons
+    def draw(self, surface):
+        if self.surface is None or self.frames % self.refresh == 0:
+            self.surface = self.build()
+        self.frames += 1
+        return [surface.blit(self.surface, (10, 40))]
+
+
+def handle_profiler_key(key):
+    if key == pygame.K_F3:
+        profiler.toggle()
+    elif key == pygame.K_F4:
+        if profiler.recording:
+            profiler.export(PROFILE_PATH, profiler.stop_recording())
+            print(f'Профиль кадров сохранён в {PROFILE_PATH}')
+        else:
+            profiler.start_recording()
 
 
-def new_game(level):
-    maze = Maze(WIDTH, HEIGHT, level)
-    player = Player(maze)
-    available_questions = list(quiz_questions.items())
-    random.shuffle(available_questions)
-    return maze, player, available_questions
+class Overlay:
+    def __init__(self):
+        self.surface = None
+        self.buttons = []
 
+    def build(self):
+        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        return overlay
 
-def draw_game_over_screen(message):
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 180))
-    screen.blit(overlay, (0, 0))
+    def update_hover(self, pos):
+        changed = False
+        for button in self.buttons:
+            hovered = button.is_hovered
+            changed |= button.check_hover(pos) != hovered
+        return changed
 
-    if 'победили' in message.lower():
-        congrats_text = font_large.render('Поздравляем!', True, MAIN_COLOR)
-        win_sound.play()
-    else:
-        congrats_text = font_large.render('Игра окончена', True, MAIN_COLOR)
-        game_over_sound.play()
+    def draw(self, surface):
+        surface.blit(self.surface, (0, 0))
+        for button in self.buttons:
+            button.draw(surface)
+
+
+class LevelSelectScreen(Overlay):
+    def __init__(self):
+        super().__init__()
+        self.buttons = [Button(WIDTH // 2 - 100, 200 + i * 70, 200, 50, f'Уровень {i + 1}', COLORS_SET[i], YELLOW)
+                        for i in range(5)]
+
+    def build(self):
+        background = pygame.Surface((WIDTH, HEIGHT))
+        background.fill(MAIN_COLOR)
+        title = text_cache.render(font_large, 'Выберите уровень сложности', True, CONTRAST_COLOR)
+        background.blit(title, (WIDTH // 2 - title.get_width() // 2, 100))
+        hint = text_cache.render(font_small, 'Чем выше уровень, тем больше врагов и выше их скорость', True, CONTRAST_COLOR)
+        background.blit(hint, (WIDTH // 2 - hint.get_width() // 2, HEIGHT - 50))
+        return background.convert()
 
-    screen.blit(congrats_text, (WIDTH // 2 - congrats_text.get_width() // 2, 150))
+    def draw(self, surface):
+        if self.surface is None:
+            self.surface = self.build()
+        super().draw(surface)
 
-    sub_text = font_medium.render(message, True, MAIN_COLOR)
-    screen.blit(sub_text, (WIDTH // 2 - sub_text.get_width() // 2, 220))
 
-    restart_button = Button(WIDTH // 2 - 150, HEIGHT // 2 + 50, 300, 50, 'Начать заново', GREEN, DARK_GREEN)
-    exit_button = Button(WIDTH // 2 - 150, HEIGHT // 2 + 120, 300, 50, 'Выход из игры', RED, DARK_RED)
+def build_level(level, size, seed):
+    maze = Maze(size[0], size[1], level, seed=seed)
+    snapshot = maze.snapshot()
+    snapshot['seed'] = seed
+    snapshot['question_seed'] = maze.rng.randrange(2 ** 32)
+    return snapshot
 
-    return overlay, restart_button, exit_button
 
+level_factory = LevelFactory(build_level, (WIDTH, HEIGHT))
 
-def draw_quiz_screen(question, answers):
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 180))
-    screen.blit(overlay, (0, 0))
 
-    question_text = font_medium.render(question, True, MAIN_COLOR)
-    screen.blit(question_text, (WIDTH // 2 - question_text.get_width() // 2, 150))
+def prefetch_levels(levels=range(1, 6)):
+    for level in levels:
+        level_factory.prefetch(level)
 
-    buttons = []
-    for i, answer in enumerate(answers):
-        btn = Button(WIDTH // 2 - 150, 200 + i * 70, 300, 50, answer, LIGHT_BLUE, YELLOW)
-        buttons.append(btn)
 
-    return overlay, buttons
+def new_game(level, seed=None, hunters=False, world=None, snapshot=None):
+    if world:
+        maze = World(world[0], world[1], level, seed=seed, hunters=hunters)
+        question_seed = maze.rng.randrange(2 ** 32)
+    else:
+        if snapshot is None:
+            snapshot = build_level(level, (WIDTH, HEIGHT), seed)
+        maze = Maze.from_snapshot(snapshot, hunters)
+        question_seed = snapshot['question_seed']
+    player = Player(maze)
+    questions = open_question_bank().session(range(1, level + 1), seed=question_seed)
+    return maze, player, questions
 
 
-def main():
-    clock = pygame.time.Clock()
-    theme_music.play(-1)
-    level_selected = None
-    level_buttons = draw_level_select()
+KEY_COMMANDS = {
+    pygame.K_UP: ('move', 0, -1),
+    pygame.K_DOWN: ('move', 0, 1),
+    pygame.K_LEFT: ('move', -1, 0),
+    pygame.K_RIGHT: ('move', 1, 0),
+    pygame.K_SPACE: ('attack',),
+}
 
-    while level_selected is None:
-        mouse_pos = pygame.mouse.get_pos()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+class Simulation:
+    def __init__(self, level, seed=None, hunters=None, world=None, snapshot=None):
+        # Без явного флага охотники включаются по HUNTER_LEVELS, чтобы игра,
+        # боты и сервер играли один и тот же уровень; записи и сохранения
+        # передают флаг явно
+        if hunters is None:
+            hunters = world is None and level in HUNTER_LEVELS
+        if snapshot is not None:
+            seed = snapshot['seed']
+        elif seed is None:
+            seed = random.randrange(2 ** 32)
+        # Сид хранится в заголовках записи и сохранения как uint32, поэтому
+        # любой целый сид сразу приводится к этому диапазону
+        seed %= 2 ** 32
+        self.level = level
+        self.seed = seed
+        self.hunters = hunters
+        self.world = world
+        self.maze, self.player, self.questions = new_game(level, seed, hunters, world, snapshot)
+        self.recorder = None
+        self.tick_count = 0
+        self.game_over = False
+        self.game_over_message = ''
+        self.quiz_active = False
+        self.current_question = ''
+        self.current_answers = []
+        self.correct_answer = ''
+
+    def apply(self, command):
+        if self.game_over:
+            return
 
-            for i, button in enumerate(level_buttons):
-                button.check_hover(mouse_pos)
-                if button.is_clicked(mouse_pos, event):
-                    level_selected = i + 1
+        if self.quiz_active:
+            if command[0] == 'answer':
+                self.answer(command[1])
+        elif command[0] == 'move':
+            self.player.move(command[1], command[2])
+        elif command[0] == 'attack':
+            self.player.attack()
+
+    def answer(self, text):
+        if text == self.correct_answer:
+            self.player.artifacts_collected += 1
+            if self.player.artifacts_collected >= 3:
+                self.game_over = True
+                self.game_over_message = 'Вы победили!'
+        else:
+            self.game_over = True
+            self.game_over_message = 'Неправильный ответ!'
+        self.quiz_active = False
 
-        screen.fill(MAIN_COLOR)
-        title = font_large.render('Выберите уровень сложности', True, CONTRAST_COLOR)
-        screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 100))
+    def resolve(self):
+        if self.game_over or self.quiz_active:
+            return
 
-        for button in level_buttons:
-            button.draw(screen)
+        x, y = self.player.x, self.player.y
+        if self.maze.enemy_at(x, y):
+            self.game_over = True
+            self.game_over_message = 'JavaScript победил!'
+
+        if self.maze.take_artifact(x, y):
+            self.quiz_active = True
+
+            drawn = self.questions.draw()
+            if drawn is not None:
+                question, answers = drawn
+                self.correct_answer = answers[0]
+                self.current_answers = answers.copy()
+                self.maze.rng.shuffle(self.current_answers)
+                self.current_question = question
+
+    def record(self, path):
+        self.recorder = replay.Recorder(path, self.level, self.seed, self.hunters, self.world, (WIDTH, HEIGHT),
+                                        self.questions.buckets)
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close(self.tick_count, self.state())
+            self.recorder = None
+
+    def state(self):
+        return (self.tick_count, self.player.x, self.player.y, self.player.artifacts_collected,
+                self.game_over_message, self.quiz_active,
+                [(enemy.x, enemy.y) for enemy in self.maze.enemies if enemy.is_alive])
+
+    def view(self):
+        player = self.player
+        return (player.x, player.y, player.attack_cooldown > 15, player.artifacts_collected, self.quiz_active,
+                self.game_over, self.maze.moves, len(self.maze.enemies), len(self.maze.artifacts))
+
+    def next_change(self):
+        # Через сколько тиков картинка изменится без ввода: ход ближайшего
+        # врага или конец вспышки атаки; None - без ввода ничего не изменится
+        if self.game_over:
+            return None
+        if self.maze.swarm is not None:
+            return 1
+        ticks = [enemy.speed - enemy.speed_counter for enemy in self.maze.enemies if enemy.is_alive]
+        if self.player.attack_cooldown > 15:
+            ticks.append(self.player.attack_cooldown - 15)
+        return max(min(ticks), 1) if ticks else None
+
+    def checkpoint(self):
+        if self.world or self.maze.swarm is not None:
+            raise ValueError('Сохранение открытого мира и роя не поддерживается')
+        player = self.player
+        return {
+            'level': self.level,
+            'seed': self.seed,
+            'hunters': self.hunters,
+            'tick_count': self.tick_count,
+            'player': (player.x, player.y, player.artifacts_collected, player.attack_cooldown),
+            'game_over': self.game_over,
+            'game_over_message': self.game_over_message,
+            'quiz_active': self.quiz_active,
+            'current_question': self.current_question,
+            'current_answers': list(self.current_answers),
+            'correct_answer': self.correct_answer,
+            'maze': self.maze.snapshot(),
+            'questions': self.questions.checkpoint(),
+        }
 
-        hint = font_small.render('Чем выше уровень, тем больше врагов и выше их скорость', True, CONTRAST_COLOR)
-        screen.blit(hint, (WIDTH // 2 - hint.get_width() // 2, HEIGHT - 50))
+    @classmethod
+    def restore(cls, checkpoint):
+        bank = open_question_bank()
+        buckets = [tuple(bucket) for bucket in checkpoint['questions']['buckets']]
+        current = bank.buckets(range(1, checkpoint['level'] + 1))
+        if buckets != current:
+            raise ValueError(f'Сохранение сделано с другим банком вопросов: корзины {buckets}, а сейчас {current}')
+
+        sim = cls.__new__(cls)
+        sim.level = checkpoint['level']
+        sim.seed = checkpoint['seed']
+        sim.hunters = checkpoint['hunters']
+        sim.world = None
+        sim.maze = Maze.from_snapshot(checkpoint['maze'], sim.hunters)
+        sim.player = player = Player(sim.maze)
+        player.x, player.y, player.artifacts_collected, player.attack_cooldown = checkpoint['player']
+        sim.maze.track_player(player.x, player.y)
+        sim.questions = QuestionSession.restore(bank, checkpoint['questions'])
+        sim.recorder = None
+        sim.tick_count = checkpoint['tick_count']
+        sim.game_over = checkpoint['game_over']
+        sim.game_over_message = checkpoint['game_over_message']
+        sim.quiz_active = checkpoint['quiz_active']
+        sim.current_question = checkpoint['current_question']
+        sim.current_answers = list(checkpoint['current_answers'])
+        sim.correct_answer = checkpoint['correct_answer']
+        return sim
+
+    def save(self, path):
+        return savegame.save(path, self.checkpoint())
+
+    @classmethod
+    def load(cls, path):
+        return cls.restore(savegame.load(path))
+
+    def step(self, commands=(), ticks=1):
+        if self.recorder is not None and commands:
+            self.recorder.log(self.tick_count, commands, self.current_answers)
+        for command in commands:
+            self.apply(command)
+        self.resolve()
+        profiler.lap('commands')
+
+        for _ in range(ticks):
+            self.player.update()
+            self.maze.track_player(self.player.x, self.player.y)
+            profiler.lap('player.update')
+            for enemy in self.maze.enemies:
+                enemy.move()
+            if self.maze.swarm is not None:
+                self.maze.swarm.move()
+            profiler.lap('enemy.move')
+            self.resolve()
+            profiler.lap('resolve')
+            self.tick_count += 1
+
+
+def play_log(path):
+    header, steps, end = replay.read_log(path)
+    if header['size'] != (WIDTH, HEIGHT):
+        raise ValueError(f'Запись сделана для окна {header["size"]}, а не {(WIDTH, HEIGHT)}')
+    sim = Simulation(header['level'], seed=header['seed'], hunters=header['hunters'], world=header['world'])
+    if header['buckets'] is not None and header['buckets'] != sim.questions.buckets:
+        raise ValueError(f'Запись сделана с другим банком вопросов: корзины {header["buckets"]}, '
+                         f'а сейчас {sim.questions.buckets}')
+
+    for tick, commands in steps:
+        if tick > sim.tick_count:
+            sim.step(ticks=tick - sim.tick_count)
+        sim.step([('answer', sim.current_answers[command[1]]) if command[0] == 'answer' else command
+                  for command in commands])
+    if end is not None and end[0] > sim.tick_count:
+        sim.step(ticks=end[0] - sim.tick_count)
+
+    matched = end is None or end[1] == replay.digest(sim.state())
+    return sim, matched
+
+
+class GameOverScreen(Overlay):
+    def __init__(self):
+        super().__init__()
+        self.message = None
+        self.restart_button = Button(WIDTH // 2 - 150, HEIGHT // 2 + 50, 300, 50, 'Начать заново', GREEN, DARK_GREEN)
+        self.exit_button = Button(WIDTH // 2 - 150, HEIGHT // 2 + 120, 300, 50, 'Выход из игры', RED, DARK_RED)
+        self.buttons = [self.restart_button, self.exit_button]
+
+    def show(self, message):
+        if message == self.message:
+            return
+        self.message = message
 
-        pygame.display.flip()
-        clock.tick(60)
+        overlay = self.build()
+        if 'победили' in message.lower():
+            congrats_text = text_cache.render(font_large, 'Поздравляем!', True, MAIN_COLOR)
+        else:
+            congrats_text = text_cache.render(font_large, 'Игра окончена', True, MAIN_COLOR)
+        overlay.blit(congrats_text, (WIDTH // 2 - congrats_text.get_width() // 2, 150))
 
-    maze, player, available_questions = new_game(level_selected)
-    game_over = False
-    quiz_active = False
-    current_question = ''
-    current_answers = []
-    correct_answer = ''
-    quiz_buttons = []
-    game_over_message = ''
+        sub_text = text_cache.render(font_medium, message, True, MAIN_COLOR)
+        overlay.blit(sub_text, (WIDTH // 2 - sub_text.get_width() // 2, 220))
+        self.surface = overlay.convert_alpha()
 
-    running = True
-    while running:
-        mouse_pos = pygame.mouse.get_pos()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+class QuizScreen(Overlay):
+    def __init__(self):
+        super().__init__()
+        self.question = None
+        self.answers = []
+
+    def show(self, question, answers):
+        if question == self.question and answers == self.answers:
+            return
+        self.question = question
+        self.answers = list(answers)
 
-            if game_over:
-                overlay, restart_button, exit_button = draw_game_over_screen(game_over_message)
+        overlay = self.build()
+        question_text = text_cache.render(font_medium, question, True, MAIN_COLOR)
+        overlay.blit(question_text, (WIDTH // 2 - question_text.get_width() // 2, 150))
+        self.surface = overlay.convert_alpha()
 
-                restart_button.check_hover(mouse_pos)
-                exit_button.check_hover(mouse_pos)
+        while len(self.buttons) < len(answers):
+            self.buttons.append(Button(WIDTH // 2 - 150, 200 + len(self.buttons) * 70, 300, 50, '', LIGHT_BLUE, YELLOW))
+        del self.buttons[len(answers):]
+        for button, answer in zip(self.buttons, answers):
+            button.set_text(answer)
 
-                if restart_button.is_clicked(mouse_pos, event):
-                    level_selected = None
-                    while level_selected is None:
-                        mouse_pos = pygame.mouse.get_pos()
 
-                        for ev in pygame.event.get():
-                            if ev.type == pygame.QUIT:
-                                running = False
-                                level_selected = 1
+def start_level(level):
+    if WORLD_CHUNKS:
+        sim = Simulation(level, world=WORLD_CHUNKS)
+    else:
+        sim = Simulation(level, snapshot=level_factory.take(level))
+        # Вероятные следующие уровни: перезапуск этого же и следующий по сложности
+        prefetch_levels((level, min(level + 1, 5)))
+    if RECORD_DIR:
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        sim.record(os.path.join(RECORD_DIR, f'{time.strftime("%Y%m%d-%H%M%S")}-level{level}-{sim.seed}.pwr'))
+    return sim
+
+
+def wait_events(clock, timeout=None):
+    # Ждёт ввода не дольше timeout секунд (None - IDLE_TIMEOUT) вместо
+    # пустых кадров; без ADAPTIVE_PACING - прежний ритм clock.tick(60)
+    if not ADAPTIVE_PACING:
+        clock.tick(TICK_RATE)
+        return pygame.event.get()
+    milliseconds = int((IDLE_TIMEOUT if timeout is None else timeout) * 1000)
+    if milliseconds <= 0:
+        return pygame.event.get()
+    event = pygame.event.wait(milliseconds)
+    events = pygame.event.get()
+    if event.type != pygame.NOEVENT:
+        events.insert(0, event)
+    return events
+
+
+class FramePacer:
+    # Фиксированный шаг симуляции с накоплением времени: цикл спит до
+    # тика, на котором что-то изменится, или до ввода, а прошедшие тики
+    # догоняет пачкой. Больше max_ticks за раз не догоняется (например,
+    # после перетаскивания окна)
+    def __init__(self, clock, tick_rate=TICK_RATE, max_ticks=2 * TICK_RATE):
+        self.clock = clock
+        self.interval = 1 / tick_rate
+        self.max_ticks = max_ticks
+        self.reset()
+
+    def reset(self):
+        self.next_tick = time.perf_counter() + self.interval
+
+    def wait(self, ticks=1):
+        if ticks is None:
+            return wait_events(self.clock)
+        return wait_events(self.clock, self.next_tick + (ticks - 1) * self.interval - time.perf_counter())
+
+    def ticks(self):
+        if not ADAPTIVE_PACING:
+            return 1
+        now = time.perf_counter()
+        if now < self.next_tick:
+            return 0
+        ticks = int((now - self.next_tick) / self.interval) + 1
+        if ticks > self.max_ticks:
+            self.next_tick = now + self.interval
+            return self.max_ticks
+        self.next_tick += ticks * self.interval
+        return ticks
+
+
+def handle_save_key(key, sim):
+    # F5 - сохранить игру, F9 - вернуться к сохранению
+    try:
+        if key == pygame.K_F5:
+            size = sim.save(SAVE_PATH)
+            print(f'Игра сохранена в {SAVE_PATH} ({size} байт)')
+        elif os.path.exists(SAVE_PATH):
+            return Simulation.load(SAVE_PATH)
+    except (OSError, ValueError, struct.error) as error:
+        print(f'Сохранение недоступно: {error}')
+    return None
+
+
+def select_level(clock, level_screen):
+    # Экран статичен: перерисовывается только при смене подсветки кнопок
+    # или по просьбе окна, а между событиями цикл спит
+    redraw = True
+    while True:
+        mouse_pos = pygame.mouse.get_pos()
+        if level_screen.update_hover(mouse_pos) or redraw or not ADAPTIVE_PACING:
+            level_screen.draw(screen)
+            pygame.display.flip()
+            redraw = False
 
-                            for i, button in enumerate(level_buttons):
-                                button.check_hover(mouse_pos)
-                                if button.is_clicked(mouse_pos, ev):
-                                    level_selected = i + 1
+        for event in wait_events(clock):
+            if event.type == pygame.QUIT:
+                return None
+            if event.type == pygame.WINDOWEXPOSED:
+                redraw = True
 
-                        screen.fill(MAIN_COLOR)
-                        title = font_large.render('Выберите уровень сложности', True, CONTRAST_COLOR)
-                        screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 100))
+            mouse_pos = pygame.mouse.get_pos()
+            for i, button in enumerate(level_screen.buttons):
+                if button.is_clicked(mouse_pos, event):
+                    return i + 1
 
-                        for button in level_buttons:
-                            button.draw(screen)
 
-                        hint = font_small.render('Чем выше уровень, тем больше врагов и выше их скорость', True, CONTRAST_COLOR)
-                        screen.blit(hint, (WIDTH // 2 - hint.get_width() // 2, HEIGHT - 50))
+def main():
+    init_display()
+    assets.prefetch()
+    audio.play_music(os.path.join('Sources/Audio', 'theme.mp3'), 0.5)
+    clock = pygame.time.Clock()
+    level_screen = LevelSelectScreen()
+    quiz_screen = QuizScreen()
+    game_over_screen = GameOverScreen()
+    if not WORLD_CHUNKS:
+        prefetch_levels()
+
+    level_selected = select_level(clock, level_screen)
+    if level_selected is None:
+        level_factory.close()
+        pygame.quit()
+        sys.exit()
+
+    sim = start_level(level_selected)
+    renderer = DirtyRenderer(screen)
+    renderer.set_background(sim.maze.render_static())
+    profiler_overlay = ProfilerOverlay(profiler)
+    game_over_announced = False
+    pacer = FramePacer(clock)
+    commands = []
+    shown = None
 
-                        pygame.display.flip()
-                        clock.tick(60)
+    running = True
+    while running:
+        # Нажатия копятся в очереди и применяются один раз на ближайшем
+        # тике; без ввода цикл спит до тика, на котором что-то изменится
+        events = pacer.wait(1 if commands or profiler.enabled else sim.next_change())
+        profiler.start_frame()
+        mouse_pos = pygame.mouse.get_pos()
+        redraw = False
 
-                    if running:
-                        maze, player, available_questions = new_game(level_selected)
-                        game_over = False
-                        quiz_active = False
-                elif exit_button.is_clicked(mouse_pos, event):
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.WINDOWEXPOSED:
+                renderer.invalidate()
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_F3, pygame.K_F4):
+                handle_profiler_key(event.key)
+                redraw = True
+                continue
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_F5, pygame.K_F9):
+                loaded = handle_save_key(event.key, sim)
+                if loaded is not None:
+                    sim.stop_recording()
+                    sim = loaded
+                    commands = []
+                    game_over_announced = sim.game_over
+                    renderer.set_background(sim.maze.render_static())
+                continue
+
+            if sim.game_over:
+                redraw |= game_over_screen.update_hover(mouse_pos)
+
+                if game_over_screen.restart_button.is_clicked(mouse_pos, event):
+                    level_selected = select_level(clock, level_screen)
+                    if level_selected is None:
+                        running = False
+                    else:
+                        sim = start_level(level_selected)
+                        commands = []
+                        game_over_announced = False
+                        renderer.set_background(sim.maze.render_static())
+                        pacer.reset()
+                elif game_over_screen.exit_button.is_clicked(mouse_pos, event):
                     running = False
-            elif quiz_active:
-                for i, button in enumerate(quiz_buttons):
-                    button.check_hover(mouse_pos)
+            elif sim.quiz_active:
+                redraw |= quiz_screen.update_hover(mouse_pos)
+                for button in quiz_screen.buttons:
                     if button.is_clicked(mouse_pos, event):
-                        if button.text == correct_answer:
-                            player.artifacts_collected += 1
-                            if player.artifacts_collected >= 3:
-                                game_over = True
-                                game_over_message = 'Вы победили!'
-                        else:
-                            game_over = True
-                            game_over_message = 'Неправильный ответ!'
-                        quiz_active = False
-            else:
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_UP:
-                        player.move(0, -1)
-                    elif event.key == pygame.K_DOWN:
-                        player.move(0, 1)
-                    elif event.key == pygame.K_LEFT:
-                        player.move(-1, 0)
-                    elif event.key == pygame.K_RIGHT:
-                        player.move(1, 0)
-                    elif event.key == pygame.K_SPACE:
-                        player.attack()
-
-                for enemy in maze.enemies:
-                    if enemy.check_collision(player.x, player.y):
-                        game_over = True
-                        game_over_message = 'JavaScript победил!'
-                        break
-
-                for artifact in maze.artifacts[:]:
-                    if (player.x, player.y) == artifact:
-                        maze.artifacts.remove(artifact)
-                        quiz_active = True
-
-                        if available_questions:
-                            question, answers = available_questions.pop()
-                            correct_answer = answers[0]
-                            current_answers = answers.copy()
-                            random.shuffle(current_answers)
-                            current_question = question
-
-        player.update()
-        for enemy in maze.enemies:
-            enemy.move()
-
-        screen.fill(MAIN_COLOR)
-        maze.draw()
-        player.draw()
-
-        text = font_small.render(f'Артефакты: {player.artifacts_collected}/3', True, BLUE)
-        screen.blit(text, (10, 10))
-
-        level_text = font_small.render(f'Уровень: {level_selected}', True, BLUE)
-        screen.blit(level_text, (WIDTH - level_text.get_width() - 10, HEIGHT - 30))
-
-        attack_hint = font_small.render('Пробел - атака', True, BLUE)
-        screen.blit(attack_hint, (WIDTH - attack_hint.get_width() - 10, 10))
-
-        if game_over:
-            overlay, restart_button, exit_button = draw_game_over_screen(game_over_message)
-            restart_button.draw(screen)
-            exit_button.draw(screen)
-        elif quiz_active:
-            overlay, quiz_buttons = draw_quiz_screen(current_question, current_answers)
-            for button in quiz_buttons:
-                button.draw(screen)
-
-        pygame.display.flip()
-        clock.tick(60)
-
+                        commands.append(('answer', button.text))
+            elif event.type == pygame.KEYDOWN and event.key in KEY_COMMANDS:
+                commands.append(KEY_COMMANDS[event.key])
+        profiler.lap('events')
+
+        ticks = pacer.ticks()
+        if sim.game_over:
+            commands = []
+        elif ticks:
+            if ticks > 1:
+                sim.step(ticks=ticks - 1)
+            sim.step(commands)
+            commands = []
+        if sim.game_over and not game_over_announced:
+            play_sound('win' if 'победили' in sim.game_over_message.lower() else 'game_over')
+            game_over_announced = True
+            sim.stop_recording()
+        if sim.maze.follow(sim.player.x, sim.player.y):
+            renderer.set_background(sim.maze.render_static())
+        profiler.lap('camera')
+
+        # Кадр рисуется, только если на экране что-то изменилось
+        view = (sim.view(), len(assets.loaded))
+        if (view != shown or redraw or renderer.full or profiler.enabled or sim.maze.swarm is not None or
+                not ADAPTIVE_PACING):
+            shown = view
+            renderer.begin(overlay=sim.game_over or sim.quiz_active)
+            rects = sim.maze.draw_actors()
+            rects += sim.player.draw(sim.maze.camera)
+            profiler.lap('maze.draw')
+            rects += draw_hud(sim.player, sim.level)
+            profiler.lap('hud')
+
+            if sim.game_over:
+                game_over_screen.show(sim.game_over_message)
+                game_over_screen.draw(screen)
+            elif sim.quiz_active:
+                quiz_screen.show(sim.current_question, sim.current_answers)
+                quiz_screen.draw(screen)
+            if profiler.enabled:
+                rects += profiler_overlay.draw(screen)
+            profiler.lap('overlay')
+
+            renderer.present(rects)
+            profiler.lap('display.flip')
+        profiler.end_frame()
+
+    sim.stop_recording()
+    level_factory.close()
     pygame.quit()
     sys.exit()
 
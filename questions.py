@@ -0,0 +1,150 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sqlite3
+from bisect import bisect_right
+
+from mazegen import CellSampler
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    level INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    answers TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS questions_bucket ON questions (level, tag, position);
+CREATE TABLE IF NOT EXISTS buckets (
+    level INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (level, tag)
+);
+'''
+
+
+class QuestionBank:
+    def __init__(self, path):
+        self.path = path
+        self.connection = None
+        self.pid = None
+
+    def connect(self):
+        # Соединение SQLite нельзя переносить в дочерний процесс,
+        # поэтому после fork оно открывается заново
+        if self.connection is None or self.pid != os.getpid():
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.connection = sqlite3.connect(self.path)
+            self.connection.executescript(SCHEMA)
+            self.pid = os.getpid()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+    def add(self, rows):
+        connection = self.connect()
+        sizes = dict(((level, tag), size) for level, tag, size in connection.execute('SELECT level, tag, size FROM buckets'))
+        added = 0
+        with connection:
+            for question, answers, level, tag in rows:
+                position = sizes.get((level, tag), 0)
+                connection.execute('INSERT INTO questions (level, tag, position, question, answers) VALUES (?, ?, ?, ?, ?)',
+                                   (level, tag, position, question, json.dumps(list(answers), ensure_ascii=False)))
+                sizes[(level, tag)] = position + 1
+                added += 1
+            connection.executemany('INSERT OR REPLACE INTO buckets (level, tag, size) VALUES (?, ?, ?)',
+                                   [(level, tag, size) for (level, tag), size in sizes.items()])
+        return added
+
+    def import_csv(self, path, level=1, tag='python'):
+        # Строка файла: вопрос, правильный ответ, неправильные ответы...,
+        # необязательные столбцы level и tag задаются заголовком
+        with open(path, newline='', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            answer_columns = [name for name in reader.fieldnames if name not in ('question', 'level', 'tag')]
+            return self.add((row['question'],
+                             [row[name] for name in answer_columns if row[name]],
+                             int(row.get('level') or level),
+                             row.get('tag') or tag) for row in reader)
+
+    def __len__(self):
+        return self.connect().execute('SELECT COALESCE(SUM(size), 0) FROM buckets').fetchone()[0]
+
+    def buckets(self, levels=None, tags=None):
+        rows = self.connect().execute('SELECT level, tag, size FROM buckets ORDER BY level, tag').fetchall()
+        return [(level, tag, size) for level, tag, size in rows
+                if size and (levels is None or level in levels) and (tags is None or tag in tags)]
+
+    def fetch(self, level, tag, position):
+        row = self.connect().execute('SELECT question, answers FROM questions WHERE level = ? AND tag = ? AND position = ?',
+                                     (level, tag, position)).fetchone()
+        return row[0], json.loads(row[1])
+
+    def session(self, levels=None, tags=None, seed=None):
+        return QuestionSession(self, self.buckets(levels, tags), random.Random(seed))
+
+
+class QuestionSession:
+    def __init__(self, bank, buckets, rng):
+        self.bank = bank
+        self.buckets = buckets
+        self.offsets = []
+        total = 0
+        for level, tag, size in buckets:
+            self.offsets.append(total)
+            total += size
+        self.sampler = CellSampler(range(total), rng)
+
+    def __len__(self):
+        return len(self.sampler)
+
+    def checkpoint(self):
+        sampler = self.sampler
+        return {
+            'buckets': list(self.buckets),
+            'size': sampler.size,
+            'moved': dict(sampler.moved),
+            'rng': sampler.rng.getstate(),
+        }
+
+    @classmethod
+    def restore(cls, bank, checkpoint):
+        rng = random.Random()
+        rng.setstate(checkpoint['rng'])
+        session = cls(bank, checkpoint['buckets'], rng)
+        session.sampler.size = checkpoint['size']
+        session.sampler.moved = dict(checkpoint['moved'])
+        return session
+
+    def draw(self):
+        rank = self.sampler.take()
+        if rank is None:
+            return None
+        i = bisect_right(self.offsets, rank) - 1
+        level, tag, size = self.buckets[i]
+        return self.bank.fetch(level, tag, rank - self.offsets[i])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Импорт вопросов в банк SQLite')
+    parser.add_argument('bank', help='файл банка вопросов')
+    parser.add_argument('csv', help='CSV со столбцами question, answer..., level, tag')
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--tag', default='python')
+    args = parser.parse_args()
+
+    bank = QuestionBank(args.bank)
+    added = bank.import_csv(args.csv, args.level, args.tag)
+    print(f'Добавлено вопросов: {added}, всего в банке: {len(bank)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import struct
+import zlib
+
+MAGIC = b'PWRP'
+VERSION = 2
+HEADER = struct.Struct('<4sBBI?HHHH')
+DIGEST = struct.Struct('<I')
+
+MOVES = ((0, -1), (0, 1), (-1, 0), (1, 0))
+ATTACK = 4
+ANSWER = 5
+END = 255
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def write_text(out, text):
+    data = text.encode('utf-8')
+    write_varint(out, len(data))
+    out += data
+
+
+def read_text(view, offset):
+    size, offset = read_varint(view, offset)
+    return str(view[offset:offset + size], 'utf-8'), offset + size
+
+
+def write_buckets(out, buckets):
+    write_varint(out, len(buckets))
+    for level, tag, size in buckets:
+        write_varint(out, level)
+        write_text(out, tag)
+        write_varint(out, size)
+
+
+def read_buckets(data, offset):
+    buckets = []
+    count, offset = read_varint(data, offset)
+    for _ in range(count):
+        level, offset = read_varint(data, offset)
+        tag, offset = read_text(data, offset)
+        size, offset = read_varint(data, offset)
+        buckets.append((level, tag, size))
+    return buckets, offset
+
+
+def digest(state):
+    return zlib.crc32(repr(state).encode('utf-8'))
+
+
+class Recorder:
+    # Формат: заголовок, корзины банка вопросов (уровень, тема, размер),
+    # затем записи «дельта тика (varint), код команды [, индекс ответа]».
+    # Файл только дописывается; запись END с контрольной суммой итогового
+    # состояния появляется при закрытии
+    def __init__(self, path, level, seed, hunters=False, world=None, size=(0, 0), buckets=()):
+        self.path = path
+        self.file = open(path, 'wb')
+        world_x, world_y = world or (0, 0)
+        header = bytearray(HEADER.pack(MAGIC, VERSION, level, seed, hunters, world_x, world_y, size[0], size[1]))
+        write_buckets(header, buckets)
+        self.file.write(header)
+        self.tick = 0
+        self.buffer = bytearray()
+        self.commands = 0
+
+    def log(self, tick, commands, answers=()):
+        out = self.buffer
+        for command in commands:
+            if command[0] == 'move':
+                code = MOVES.index((command[1], command[2]))
+            elif command[0] == 'attack':
+                code = ATTACK
+            elif command[0] == 'answer' and command[1] in answers:
+                code = ANSWER
+            else:
+                continue
+            write_varint(out, tick - self.tick)
+            out.append(code)
+            if code == ANSWER:
+                out.append(answers.index(command[1]))
+            self.tick = tick
+            self.commands += 1
+        if len(out) >= 4096:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self, tick, state=None):
+        if self.file is None:
+            return
+        write_varint(self.buffer, tick - self.tick)
+        self.buffer.append(END)
+        self.buffer += DIGEST.pack(digest(state))
+        self.flush()
+        self.file.close()
+        self.file = None
+
+
+def read_log(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, version, level, seed, hunters, world_x, world_y, width, height = HEADER.unpack_from(data)
+    if magic != MAGIC or version not in (1, VERSION):
+        raise ValueError(f'Неизвестный формат записи: {path}')
+    # В записях первой версии корзин нет, их вопросы не проверяются
+    buckets, offset = read_buckets(data, HEADER.size) if version >= 2 else (None, HEADER.size)
+    header = {
+        'level': level,
+        'seed': seed,
+        'hunters': hunters,
+        'world': (world_x, world_y) if world_x else None,
+        'size': (width, height),
+        'buckets': buckets,
+    }
+
+    # Команды одного тика собираются в список; обрезанный хвост (игра
+    # закрылась без END) просто отбрасывается
+    steps = []
+    end = None
+    tick = 0
+    try:
+        while offset < len(data):
+            delta, offset = read_varint(data, offset)
+            tick += delta
+            code = data[offset]
+            offset += 1
+            if code == END:
+                end = (tick, DIGEST.unpack_from(data, offset)[0])
+                break
+            if code == ANSWER:
+                command = ('answer', data[offset])
+                offset += 1
+            elif code == ATTACK:
+                command = ('attack',)
+            else:
+                command = ('move',) + MOVES[code]
+            if steps and steps[-1][0] == tick:
+                steps[-1][1].append(command)
+            else:
+                steps.append((tick, [command]))
+    except (IndexError, struct.error):
+        pass
+    return header, steps, end
@@ -0,0 +1,203 @@
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from replay import read_buckets, read_text, read_varint, write_buckets, write_text, write_varint
+
+MAGIC = b'PWSV'
+VERSION = 1
+HEADER = struct.Struct('<4sBBI?IHHBB??')
+SIZE = struct.Struct('<HH')
+COUNT = struct.Struct('<I')
+POINT = struct.Struct('<HH')
+ENEMY = struct.Struct('<HHbbHHH?')
+RNG = struct.Struct('<625I')
+GAUSS = struct.Struct('<?d')
+DIGEST = struct.Struct('<I')
+
+
+def write_rng(out, state):
+    version, internal, gauss = state
+    out += RNG.pack(*internal)
+    out += GAUSS.pack(gauss is not None, gauss or 0.0)
+
+
+def read_rng(view, offset):
+    internal = RNG.unpack_from(view, offset)
+    offset += RNG.size
+    has_gauss, gauss = GAUSS.unpack_from(view, offset)
+    return (3, internal, gauss if has_gauss else None), offset + GAUSS.size
+
+
+def write_cells(out, cells):
+    # Индексы клеток пишутся как есть, little-endian int32: при загрузке
+    # это одно копирование памяти в array без разбора по элементам
+    if sys.byteorder == 'big':
+        cells = array('i', cells)
+        cells.byteswap()
+    out += COUNT.pack(len(cells))
+    out += memoryview(cells).cast('B')
+
+
+def read_cells(view, offset):
+    count = COUNT.unpack_from(view, offset)[0]
+    offset += COUNT.size
+    cells = array('i')
+    end = offset + count * cells.itemsize
+    cells.frombytes(view[offset:end])
+    if sys.byteorder == 'big':
+        cells.byteswap()
+    return cells, end
+
+
+def dumps(checkpoint):
+    # Формат: заголовок, сетка (байт на клетку), индексы открытых и
+    # достижимых клеток, артефакты, враги со счётчиками движения, тексты
+    # вопроса, состояния обоих генераторов, выборка вопросов и CRC32 всего
+    # предыдущего
+    maze = checkpoint['maze']
+    x, y, artifacts_collected, attack_cooldown = checkpoint['player']
+    out = bytearray(HEADER.pack(MAGIC, VERSION, checkpoint['level'], checkpoint['seed'], checkpoint['hunters'],
+                                checkpoint['tick_count'], x, y, artifacts_collected, attack_cooldown,
+                                checkpoint['game_over'], checkpoint['quiz_active']))
+
+    width, height = maze['size']
+    out += SIZE.pack(width, height)
+    out.append(maze['level'])
+    write_text(out, maze['generator'])
+    out += maze['cells']
+    write_cells(out, maze['open_cells'])
+    write_cells(out, maze['reachable'])
+
+    out += COUNT.pack(len(maze['artifacts']))
+    for point in maze['artifacts']:
+        out += POINT.pack(*point)
+    out += COUNT.pack(len(maze['enemies']))
+    for x, y, direction, path_length, move_counter, speed_counter, is_alive in maze['enemies']:
+        out += ENEMY.pack(x, y, direction[0], direction[1], path_length, move_counter, speed_counter, is_alive)
+    write_rng(out, maze['rng'])
+
+    write_text(out, checkpoint['game_over_message'])
+    write_text(out, checkpoint['current_question'])
+    write_text(out, checkpoint['correct_answer'])
+    write_varint(out, len(checkpoint['current_answers']))
+    for answer in checkpoint['current_answers']:
+        write_text(out, answer)
+
+    questions = checkpoint['questions']
+    write_buckets(out, questions['buckets'])
+    write_varint(out, questions['size'])
+    write_varint(out, len(questions['moved']))
+    for position, rank in questions['moved'].items():
+        write_varint(out, position)
+        write_varint(out, rank)
+    write_rng(out, questions['rng'])
+
+    out += DIGEST.pack(zlib.crc32(out))
+    return bytes(out)
+
+
+def loads(data):
+    view = memoryview(data)
+    if len(view) < HEADER.size + DIGEST.size:
+        raise ValueError('Файл сохранения обрезан')
+    (magic, version, level, seed, hunters, tick_count, x, y, artifacts_collected, attack_cooldown,
+     game_over, quiz_active) = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Неизвестный формат сохранения')
+    if DIGEST.unpack_from(view, len(view) - DIGEST.size)[0] != zlib.crc32(view[:-DIGEST.size]):
+        raise ValueError('Файл сохранения повреждён')
+
+    offset = HEADER.size
+    width, height = SIZE.unpack_from(view, offset)
+    offset += SIZE.size
+    maze_level = view[offset]
+    generator, offset = read_text(view, offset + 1)
+    cells = view[offset:offset + width * height]
+    offset += width * height
+    open_cells, offset = read_cells(view, offset)
+    reachable, offset = read_cells(view, offset)
+
+    count = COUNT.unpack_from(view, offset)[0]
+    offset += COUNT.size
+    artifacts = list(POINT.iter_unpack(view[offset:offset + count * POINT.size]))
+    offset += count * POINT.size
+    count = COUNT.unpack_from(view, offset)[0]
+    offset += COUNT.size
+    enemies = [(x, y, (dx, dy), path_length, move_counter, speed_counter, is_alive)
+               for x, y, dx, dy, path_length, move_counter, speed_counter, is_alive
+               in ENEMY.iter_unpack(view[offset:offset + count * ENEMY.size])]
+    offset += count * ENEMY.size
+    maze_rng, offset = read_rng(view, offset)
+
+    game_over_message, offset = read_text(view, offset)
+    current_question, offset = read_text(view, offset)
+    correct_answer, offset = read_text(view, offset)
+    count, offset = read_varint(view, offset)
+    current_answers = []
+    for _ in range(count):
+        answer, offset = read_text(view, offset)
+        current_answers.append(answer)
+
+    buckets, offset = read_buckets(view, offset)
+    remaining, offset = read_varint(view, offset)
+    moved = {}
+    count, offset = read_varint(view, offset)
+    for _ in range(count):
+        position, offset = read_varint(view, offset)
+        moved[position], offset = read_varint(view, offset)
+    question_rng, offset = read_rng(view, offset)
+
+    return {
+        'level': level,
+        'seed': seed,
+        'hunters': hunters,
+        'tick_count': tick_count,
+        'player': (x, y, artifacts_collected, attack_cooldown),
+        'game_over': game_over,
+        'game_over_message': game_over_message,
+        'quiz_active': quiz_active,
+        'current_question': current_question,
+        'current_answers': current_answers,
+        'correct_answer': correct_answer,
+        'maze': {
+            'size': (width, height),
+            'level': maze_level,
+            'generator': generator,
+            'cells': cells,
+            'open_cells': open_cells,
+            'reachable': reachable,
+            'artifacts': artifacts,
+            'enemies': enemies,
+            'rng': maze_rng,
+        },
+        'questions': {
+            'buckets': buckets,
+            'size': remaining,
+            'moved': moved,
+            'rng': question_rng,
+        },
+    }
+
+
+def save(path, checkpoint):
+    # Запись во временный файл и замена целиком: сбой посреди F5 не портит
+    # прежнее сохранение
+    data = dumps(checkpoint)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return len(data)
+
+
+def load(path):
+    with open(path, 'rb') as file:
+        return loads(file.read())
@@ -0,0 +1,324 @@
+import argparse
+import asyncio
+import json
+import os
+import struct
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pythonWalk as game
+import replay
+from profiler import FrameProfiler
+
+# Кадр: длина (uint32) и полезная нагрузка, первый байт которой - тип
+FRAME = struct.Struct('<I')
+HELLO = 1
+COMMAND = 2
+STATS = 5
+
+INIT = 1
+STATE = 2
+QUIZ = 3
+OVER = 4
+
+HELLO_MESSAGE = struct.Struct('<BBI')
+INIT_MESSAGE = struct.Struct('<BHHB')
+STATE_MESSAGE = struct.Struct('<BIHHBB')
+POINT = struct.Struct('<HH')
+ENEMY = struct.Struct('<HHH')
+COUNT = struct.Struct('<H')
+
+QUIZ_FLAG = 1
+OVER_FLAG = 2
+ATTACK_FLAG = 4
+ARTIFACTS_FLAG = 8
+DEAD = 0xFFFF
+SEPARATOR = '\x1f'
+
+# Запросы клиента короткие: длиннее - значит поток испорчен
+MAX_REQUEST = 64
+# Выше WRITE_HIGH сессия ставится на паузу, выше WRITE_LIMIT - отключается
+WRITE_HIGH = 64 * 1024
+WRITE_LIMIT = 1024 * 1024
+
+
+def frame(payload):
+    return FRAME.pack(len(payload)) + payload
+
+
+def split_frames(buffer):
+    # Отрезает из буфера все полные кадры, неполный хвост остаётся
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= FRAME.size:
+        size = FRAME.unpack_from(buffer, offset)[0]
+        if len(buffer) - offset - FRAME.size < size:
+            break
+        start = offset + FRAME.size
+        frames.append(bytes(buffer[start:start + size]))
+        offset = start + size
+    del buffer[:offset]
+    return frames
+
+
+def encode_command(command, answers=()):
+    if command[0] == 'move':
+        return bytes((COMMAND, replay.MOVES.index((command[1], command[2]))))
+    if command[0] == 'attack':
+        return bytes((COMMAND, replay.ATTACK))
+    return bytes((COMMAND, replay.ANSWER, answers.index(command[1])))
+
+
+def decode_state(payload):
+    _, tick, x, y, artifacts_collected, flags = STATE_MESSAGE.unpack_from(payload)
+    offset = STATE_MESSAGE.size
+    artifacts = None
+    if flags & ARTIFACTS_FLAG:
+        count = payload[offset]
+        offset += 1
+        artifacts = [POINT.unpack_from(payload, offset + i * POINT.size) for i in range(count)]
+        offset += count * POINT.size
+    count = COUNT.unpack_from(payload, offset)[0]
+    offset += COUNT.size
+    enemies = [ENEMY.unpack_from(payload, offset + i * ENEMY.size) for i in range(count)]
+    return {
+        'tick': tick,
+        'player': (x, y),
+        'artifacts_collected': artifacts_collected,
+        'flags': flags,
+        'artifacts': artifacts,
+        'enemies': enemies,
+    }
+
+
+class Session(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.buffer = bytearray()
+        self.sim = None
+        self.commands = []
+        self.paused = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=WRITE_HIGH)
+        self.server.sessions.add(self)
+
+    def connection_lost(self, error):
+        self.server.sessions.discard(self)
+
+    def pause_writing(self):
+        # Клиент не читает: дельты не копятся в буфере, а после
+        # resume_writing уходит одно полное состояние
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        if self.sim is not None:
+            self.sent_player = None
+            self.sent_enemies = [None] * len(self.sim.maze.enemies)
+            self.sent_artifacts = None
+            self.quiz_sent = False
+
+    def data_received(self, data):
+        self.buffer += data
+        for payload in split_frames(self.buffer):
+            if not self.handle(payload):
+                self.transport.close()
+                return
+        if len(self.buffer) > MAX_REQUEST:
+            self.transport.close()
+
+    def handle(self, payload):
+        # False - кадр испорчен, соединение закрывается
+        if not payload:
+            return False
+        kind = payload[0]
+        if kind == HELLO:
+            if len(payload) != HELLO_MESSAGE.size:
+                return False
+            _, level, seed = HELLO_MESSAGE.unpack(payload)
+            self.start(level, seed or None)
+        elif kind == COMMAND and self.sim is not None:
+            if len(payload) < 2:
+                return False
+            code = payload[1]
+            if code == replay.ANSWER:
+                if len(payload) < 3:
+                    return False
+                if payload[2] < len(self.sim.current_answers):
+                    self.commands.append(('answer', self.sim.current_answers[payload[2]]))
+            elif code == replay.ATTACK:
+                self.commands.append(('attack',))
+            elif code < len(replay.MOVES):
+                self.commands.append(('move',) + replay.MOVES[code])
+        elif kind == STATS:
+            self.send(bytes((STATS,)) + json.dumps(self.server.stats()).encode('utf-8'))
+        return True
+
+    def start(self, level, seed):
+        self.sim = sim = game.Simulation(min(max(level, 1), 5), seed=seed)
+        self.commands = []
+        self.sent_player = None
+        self.sent_enemies = [None] * len(sim.maze.enemies)
+        self.sent_artifacts = None
+        self.quiz_sent = False
+        self.over_sent = False
+        maze = sim.maze
+        self.send(INIT_MESSAGE.pack(INIT, maze.width, maze.height, sim.level) + bytes(maze.cells))
+        self.send(self.encode_state())
+
+    def send(self, payload):
+        self.write(frame(payload))
+
+    def write(self, data):
+        # Ответы на запросы идут и на паузе, но клиент, который шлёт их
+        # не читая, отключается, чтобы буфер не рос без предела
+        if self.transport.is_closing():
+            return 0
+        if self.transport.get_write_buffer_size() + len(data) > WRITE_LIMIT:
+            self.transport.abort()
+            return 0
+        self.transport.write(data)
+        return len(data)
+
+    def encode_state(self):
+        sim = self.sim
+        player = sim.player
+        flags = ((QUIZ_FLAG if sim.quiz_active else 0) | (OVER_FLAG if sim.game_over else 0) |
+                 (ATTACK_FLAG if player.attack_cooldown > 15 else 0))
+        state = (player.x, player.y, player.artifacts_collected, flags)
+
+        changed = []
+        sent = self.sent_enemies
+        for index, enemy in enumerate(sim.maze.enemies):
+            position = (enemy.x, enemy.y) if enemy.is_alive else (DEAD, DEAD)
+            if sent[index] != position:
+                sent[index] = position
+                changed.append(ENEMY.pack(index, *position))
+
+        artifacts = b''
+        if sim.maze.artifacts != self.sent_artifacts:
+            self.sent_artifacts = list(sim.maze.artifacts)
+            flags |= ARTIFACTS_FLAG
+            artifacts = bytes((len(sim.maze.artifacts),)) + b''.join(POINT.pack(*point) for point in sim.maze.artifacts)
+        elif state == self.sent_player and not changed:
+            return None
+        self.sent_player = state
+
+        return (STATE_MESSAGE.pack(STATE, sim.tick_count, player.x, player.y, player.artifacts_collected, flags) +
+                artifacts + COUNT.pack(len(changed)) + b''.join(changed))
+
+    def update(self):
+        sim = self.sim
+        if sim is None or self.over_sent:
+            return 0
+
+        commands, self.commands = self.commands, []
+        sim.step(commands)
+        if self.paused:
+            return 0
+
+        # Всё, что сессия отправляет за тик, уходит одной записью в сокет
+        out = []
+        state = self.encode_state()
+        if state is not None:
+            out.append(frame(state))
+        if sim.quiz_active and not self.quiz_sent:
+            text = SEPARATOR.join([sim.current_question] + sim.current_answers)
+            out.append(frame(bytes((QUIZ,)) + text.encode('utf-8')))
+        self.quiz_sent = sim.quiz_active
+        if sim.game_over:
+            out.append(frame(bytes((OVER,)) + sim.game_over_message.encode('utf-8')))
+            self.over_sent = True
+
+        if not out:
+            return 0
+        return self.write(b''.join(out))
+
+
+class GameServer:
+    def __init__(self, tick_rate=60, window=3600):
+        self.tick_rate = tick_rate
+        self.sessions = set()
+        self.timings = FrameProfiler(window)
+        self.timings.enabled = True
+        self.ticks = 0
+        self.overruns = 0
+        self.sent = 0
+
+    async def serve(self, host, port, report=None):
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(lambda: Session(self), host, port)
+        tasks = [asyncio.create_task(self.run_ticks())]
+        if report:
+            tasks.append(asyncio.create_task(self.report(report)))
+        print(f'Сервер слушает {host}:{port}, {self.tick_rate} тиков/с')
+        async with server:
+            await asyncio.gather(*tasks)
+
+    async def run_ticks(self):
+        # Один общий планировщик на все сессии: тик обрабатывает их пачкой,
+        # а при отставании следующий тик начинается сразу, без догоняющих
+        interval = 1 / self.tick_rate
+        scheduled = time.perf_counter()
+        while True:
+            start = time.perf_counter()
+            self.timings.record('lateness', scheduled, start)
+            for session in list(self.sessions):
+                self.sent += session.update()
+            end = time.perf_counter()
+            self.timings.record('tick', start, end)
+            self.ticks += 1
+
+            scheduled += interval
+            if scheduled < end:
+                self.overruns += 1
+                scheduled = end
+            await asyncio.sleep(scheduled - end)
+
+    def stats(self):
+        tick = self.timings.percentiles('tick')
+        lateness = self.timings.percentiles('lateness')
+        return {
+            'sessions': len(self.sessions),
+            'paused': sum(session.paused for session in self.sessions),
+            'buffered_bytes': sum(session.transport.get_write_buffer_size() for session in self.sessions),
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'sent_bytes': self.sent,
+            'tick_ms': [value * 1000 for value in tick],
+            'lateness_ms': [value * 1000 for value in lateness],
+        }
+
+    async def report(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats()
+            p50, p95, p99 = stats['tick_ms']
+            print(f'сессий {stats["sessions"]}, тик p50/p95/p99 {p50:.2f}/{p95:.2f}/{p99:.2f} мс, '
+                  f'опоздание p99 {stats["lateness_ms"][2]:.2f} мс, пропусков {stats["overruns"]}, '
+                  f'отправлено {stats["sent_bytes"] / 1024:.0f} КБ, на паузе {stats["paused"]}, '
+                  f'в буферах {stats["buffered_bytes"] / 1024:.0f} КБ')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сервер множества игровых сессий без окна')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--tick-rate', type=int, default=60)
+    parser.add_argument('--report', type=float, default=5.0, help='интервал отчёта, с (0 - без отчёта)')
+    args = parser.parse_args()
+
+    game.open_question_bank()
+    try:
+        asyncio.run(GameServer(args.tick_rate).serve(args.host, args.port, args.report))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
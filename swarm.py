@@ -0,0 +1,98 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class EnemySwarm:
+    def __init__(self, cells, width, height, xs, ys, speed, seed=None):
+        if np is None:
+            raise RuntimeError('Для роя врагов нужен пакет numpy')
+
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+
+        # Сетка с рамкой из стен: соседей можно смотреть без проверки границ
+        self.stride = width + 2
+        grid = np.frombuffer(bytes(cells), dtype=np.uint8).reshape(height, width)
+        self.open = np.zeros((height + 2, self.stride), dtype=bool)
+        self.open[1:-1, 1:-1] = grid == 0
+        self.open = self.open.ravel()
+        self.offsets = np.array([dx + dy * self.stride for dx, dy in STEPS], dtype=np.int64)
+        self.dx = np.array([dx for dx, dy in STEPS], dtype=np.int32)
+        self.dy = np.array([dy for dx, dy in STEPS], dtype=np.int32)
+
+        count = len(xs)
+        self.x = np.asarray(xs, dtype=np.int32).copy()
+        self.y = np.asarray(ys, dtype=np.int32).copy()
+        self.direction = self.rng.integers(0, 4, count, dtype=np.int8)
+        self.move_counter = np.zeros(count, dtype=np.int32)
+        self.path_length = self.rng.integers(1, 4, count, dtype=np.int32)
+        self.is_alive = np.ones(count, dtype=bool)
+        self.speed_counter = np.zeros(count, dtype=np.int32)
+        self.speed = speed
+
+        self.occupancy = np.zeros(width * height, dtype=np.int32)
+        np.add.at(self.occupancy, self.y * width + self.x, 1)
+
+    def __len__(self):
+        return len(self.x)
+
+    def move(self):
+        self.speed_counter[self.is_alive] += 1
+        ready = np.flatnonzero(self.is_alive & (self.speed_counter >= self.speed))
+        if not ready.size:
+            return
+        self.speed_counter[ready] = 0
+
+        position = (self.y[ready] + 1) * self.stride + self.x[ready] + 1
+        direction = self.direction[ready]
+        blocked = ~self.open[position + self.offsets[direction]]
+        turning = blocked | (self.move_counter[ready] >= self.path_length[ready])
+
+        if turning.any():
+            turn = ready[turning]
+            neighbours = self.open[position[turning, None] + self.offsets[None, :]]
+            counts = neighbours.sum(axis=1)
+            pick = (self.rng.random(turn.size) * counts).astype(np.int32)
+            choice = (np.cumsum(neighbours, axis=1) <= pick[:, None]).sum(axis=1)
+
+            free = counts > 0
+            self.direction[turn[free]] = choice[free]
+            self.path_length[turn[free]] = self.rng.integers(1, 4, int(free.sum()), dtype=np.int32)
+            self.move_counter[turn[free]] = 0
+
+            stuck = np.zeros(ready.size, dtype=bool)
+            stuck[np.flatnonzero(turning)[~free]] = True
+            ready = ready[~stuck]
+            position = position[~stuck]
+
+        direction = self.direction[ready]
+        movable = self.open[position + self.offsets[direction]]
+        ready = ready[movable]
+        direction = direction[movable]
+        np.subtract.at(self.occupancy, self.y[ready] * self.width + self.x[ready], 1)
+        self.x[ready] += self.dx[direction]
+        self.y[ready] += self.dy[direction]
+        np.add.at(self.occupancy, self.y[ready] * self.width + self.x[ready], 1)
+        self.move_counter[ready] += 1
+
+    def check_collision(self, player_x, player_y):
+        return bool(self.occupancy[player_y * self.width + player_x])
+
+    def kill_within(self, x, y, radius):
+        reach = int(radius)
+        area = self.occupancy.reshape(self.height, self.width)
+        if not area[max(y - reach, 0):y + reach + 1, max(x - reach, 0):x + reach + 1].any():
+            return 0
+
+        hit = self.is_alive & ((self.x - x) ** 2 + (self.y - y) ** 2 <= radius * radius)
+        self.is_alive[hit] = False
+        np.subtract.at(self.occupancy, self.y[hit] * self.width + self.x[hit], 1)
+        return int(hit.sum())
+
+    def alive_positions(self):
+        return zip(self.x[self.is_alive].tolist(), self.y[self.is_alive].tolist())